@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from database import get_db
 from models import Classroom
+from services.schedules_service import find_free_classrooms, parse_time_range
 from pydantic import BaseModel, Field
 
 router = APIRouter()
@@ -26,6 +27,18 @@ class ClassroomResponse(ClassroomBase):
 def get_classrooms(db: Session = Depends(get_db)):
     return db.query(Classroom).all()
 
+@router.get("/free", response_model=List[ClassroomResponse])
+def get_free_classrooms(
+    day: str = Query(..., min_length=1),
+    time_range: str = Query(..., description="HH:MM-HH:MM"),
+    type: Optional[str] = Query(None, description="Classroom type, Turkish or English (e.g. lab, teorik, lecture)"),
+    min_capacity: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    if parse_time_range(time_range) is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid time range")
+    return find_free_classrooms(day, time_range, db, room_type=type, min_capacity=min_capacity)
+
 @router.get("/{classroom_id}", response_model=ClassroomResponse)
 def get_classroom(classroom_id: int, db: Session = Depends(get_db)):
     try:
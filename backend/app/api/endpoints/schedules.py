@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session, joinedload
 from database import get_db
 from schemas.schedule import ScheduleCreate, ScheduleResponse
@@ -8,11 +8,13 @@ from services.schedules_service import (
     update_schedule as update_schedule_service,
     delete_schedule as delete_schedule_service,
     delete_schedules_by_day as delete_schedules_by_day_service,
-    delete_schedules_by_days as delete_schedules_by_days_service
+    delete_schedules_by_days as delete_schedules_by_days_service,
+    overlapping_schedules
 )
 from pydantic import BaseModel
-from typing import List
-from models import Schedule
+from typing import List, Optional
+from models import Schedule, parse_time_range
+from services.scheduling.fitness import parse_minutes
 
 router = APIRouter()
 
@@ -65,6 +67,34 @@ def get_schedules(db: Session = Depends(get_db)):
         })
     return result
 
+@router.get("/overlapping")
+def get_overlapping_schedules(
+    day: str = Query(..., min_length=1),
+    time_range: str = Query(..., description="HH:MM-HH:MM, or HH:MM for what is on at that minute"),
+    classroom_id: Optional[int] = Query(None),
+    db: Session = Depends(get_db)
+):
+    if '-' in time_range:
+        parsed = parse_time_range(time_range)
+    else:
+        # Tek saat: o dakikada süren kayıtlar, yani [t, t+1) ile çakışanlar
+        try:
+            start = parse_minutes(time_range)
+            parsed = (start, start + 1)
+        except ValueError:
+            parsed = None
+    if parsed is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid time range")
+    query = overlapping_schedules(day, parsed[0], parsed[1], db)
+    if classroom_id is not None:
+        query = query.filter(Schedule.classroom_id == classroom_id)
+    return [
+        ScheduleResponse(
+            id=s.id, day=s.day, time_range=s.time_range, course_id=s.course_id, classroom_id=s.classroom_id
+        ).dict()
+        for s in query.order_by(Schedule.start_minute, Schedule.id).all()
+    ]
+
 @router.get("/{schedule_id}")
 def get_schedule_endpoint(schedule_id: int, db: Session = Depends(get_db)):
     try:
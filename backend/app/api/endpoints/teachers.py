@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends
+from typing import Dict, List
 from sqlalchemy.orm import Session
 from database import get_db
 from schemas.teacher import TeacherCreate, TeacherResponse
@@ -6,7 +7,8 @@ from services.teachers_service import (
     get_all_teachers, get_teacher_by_id,
     create_teacher as create_teacher_service,
     update_teacher as update_teacher_service,
-    delete_teacher as delete_teacher_service
+    delete_teacher as delete_teacher_service,
+    set_unavailable_times
 )
 
 router = APIRouter()
@@ -39,6 +41,13 @@ def update_teacher_endpoint(teacher_id: int, teacher: TeacherCreate, db: Session
     updated_teacher = update_teacher_service(teacher_id, teacher, db)
     return TeacherResponse(**updated_teacher.__dict__).dict()
 
+@router.put("/{teacher_id}/unavailable-times")
+def update_unavailable_times_endpoint(
+    teacher_id: int, unavailable_times: Dict[str, List[str]], db: Session = Depends(get_db)
+):
+    availability = set_unavailable_times(teacher_id, unavailable_times, db)
+    return {"teacher_id": teacher_id, "availability": availability}
+
 @router.delete("/{teacher_id}")
 def delete_teacher_endpoint(teacher_id: int, db: Session = Depends(get_db)):
     delete_teacher_service(teacher_id, db)
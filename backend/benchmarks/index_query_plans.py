@@ -0,0 +1,126 @@
+"""Query plans and timings of the hot-path queries with and without indexes.
+
+Builds a throwaway SQLite database with a 50k-row ``schedule`` table,
+runs the scheduler/CRUD access patterns once without the indexes added in
+migrations ``9b41e6d2c7a5`` and ``c2d8f4a61e97`` and once with them, and
+prints SQLite's ``EXPLAIN QUERY PLAN`` plus the median time of each query.
+
+    python benchmarks/index_query_plans.py [--rows 50000] [--repeat 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from database import Base
+from models import Course, Classroom, Teacher, Schedule, CourseSession, CourseDepartment
+
+HOT_INDEXES = (
+    "ix_schedule_day_classroom_id", "ix_schedule_course_id", "ix_schedule_classroom_id",
+    "ix_courses_is_active", "ix_courses_teacher_id", "ix_course_sessions_course_id",
+    "ix_course_departments_course_id", "ix_course_departments_department_course_id",
+    "ix_schedule_day_start_end",
+)
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+
+
+def populate(db, rows, seed=0):
+    rng = random.Random(seed)
+    n_courses, n_rooms, n_teachers = max(1, rows // 25), max(1, rows // 250), max(1, rows // 100)
+    db.bulk_insert_mappings(Teacher, [{"id": i + 1, "name": f"T{i}"} for i in range(n_teachers)])
+    db.bulk_insert_mappings(Classroom, [
+        {"id": i + 1, "name": f"R{i}", "capacity": 40, "type": "teorik"} for i in range(n_rooms)
+    ])
+    db.bulk_insert_mappings(Course, [{
+        "id": i + 1, "code": f"C{i}", "name": f"C{i}", "teacher_id": rng.randint(1, n_teachers),
+        "level": str(rng.randint(1, 4)), "is_active": rng.random() < 0.2,
+    } for i in range(n_courses)])
+    db.bulk_insert_mappings(CourseSession, [
+        {"course_id": i + 1, "type": kind, "hours": 2} for i in range(n_courses) for kind in ("teorik", "lab")
+    ])
+    db.bulk_insert_mappings(CourseDepartment, [
+        {"course_id": i + 1, "department": f"D{rng.randint(0, 40)}", "student_count": 30} for i in range(n_courses)
+    ])
+    # Derslerin %10'u programsız kalır
+    scheduled = list(range(1, int(n_courses * 0.9) + 1))
+    db.bulk_insert_mappings(Schedule, [{
+        "day": rng.choice(DAYS), "time_range": "09:00-10:30",
+        "course_id": rng.choice(scheduled), "classroom_id": rng.randint(1, n_rooms),
+    } for _ in range(rows)])
+    db.commit()
+
+
+def queries(db):
+    """Name -> ORM query of the access patterns the indexes target."""
+    active_ids = db.query(Course.id).filter(Course.is_active == True)
+    return {
+        "unscheduled courses (~Course.schedules.any())": db.query(Course).filter(~Course.schedules.any()),
+        "status: schedules of active courses": db.query(Schedule).filter(Schedule.course_id.in_(active_ids)),
+        "delete by day": db.query(Schedule.id).filter(Schedule.day == "Wednesday"),
+        "free rooms / conflicts (day, classroom)": db.query(Schedule).filter(
+            Schedule.day.in_(["Wednesday", "wednesday"]), Schedule.classroom_id == 7
+        ),
+        "classroom.schedules": db.query(Schedule).filter(Schedule.classroom_id == 7),
+        "selectinload sessions": db.query(CourseSession).filter(CourseSession.course_id.in_(range(1, 400))),
+        "cohort courses (department)": db.query(CourseDepartment.course_id).filter(
+            CourseDepartment.department.in_(["D3", "D4"])
+        ),
+    }
+
+
+def measure(engine, db, repeat):
+    results = {}
+    with engine.connect() as conn:
+        for name, query in queries(db).items():
+            sql = str(query.statement.compile(engine, compile_kwargs={"literal_binds": True}))
+            plan = [row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql))]
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                conn.execute(text(sql)).fetchall()
+                timings.append(time.perf_counter() - started)
+            results[name] = (plan, statistics.median(timings) * 1000)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        indexes = {
+            index.name: index for table in Base.metadata.tables.values()
+            for index in table.indexes if index.name in HOT_INDEXES
+        }
+        for index in indexes.values():
+            index.drop(engine)
+        db = sessionmaker(bind=engine)()
+        populate(db, args.rows)
+        before = measure(engine, db, args.repeat)
+        for index in indexes.values():
+            index.create(engine)
+        with engine.connect() as conn:
+            conn.execute(text("ANALYZE"))
+        after = measure(engine, db, args.repeat)
+        db.close()
+        engine.dispose()
+    print(f"schedule rows: {args.rows}, median of {args.repeat} runs\n")
+    for name in before:
+        (plan_before, ms_before), (plan_after, ms_after) = before[name], after[name]
+        print(f"{name}: {ms_before:.2f} ms -> {ms_after:.2f} ms")
+        print("  before: " + " | ".join(plan_before))
+        print("  after:  " + " | ".join(plan_after))
+
+
+if __name__ == "__main__":
+    main()
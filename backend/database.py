@@ -1,6 +1,8 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from dotenv import load_dotenv
 import os
 
@@ -10,12 +12,87 @@ load_dotenv()
 # Veritabanı yolu
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-# Veritabanı klasörünü kontrol et ve oluştur
-os.makedirs(os.path.dirname(DATABASE_URL.split("///")[1]), exist_ok=True)
-
 SQLALCHEMY_DATABASE_URL = DATABASE_URL
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+
+def _env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+def _env_bool(name, default):
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+def sqlite_pragmas():
+    """PRAGMAs run on every new SQLite connection (each one tunable by environment).
+
+    ``busy_timeout`` makes a second writer wait for the lock instead of
+    failing with "database is locked". WAL (``SQLITE_JOURNAL_MODE=WAL``)
+    lets readers keep reading the last committed timetable while a
+    generate run writes; it is opt-in because the mode is stored in the
+    database file itself and would rewrite the bundled ``data/swesys.db``.
+    """
+    pragmas = {
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "busy_timeout": _env_int("SQLITE_BUSY_TIMEOUT_MS", 5000),
+        # Negatif değer KiB cinsinden: -65536 = 64 MiB sayfa önbelleği
+        "cache_size": _env_int("SQLITE_CACHE_SIZE", -65536),
+        "mmap_size": _env_int("SQLITE_MMAP_SIZE", 256 * 1024 * 1024),
+        "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+    }
+    journal_mode = os.getenv("SQLITE_JOURNAL_MODE")
+    if journal_mode:
+        pragmas["journal_mode"] = journal_mode
+    return pragmas
+
+
+def engine_options(url):
+    """``create_engine`` keyword arguments of the profile matching ``url``'s backend."""
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        options = {"connect_args": {"check_same_thread": False}}
+        if make_url(url).database not in (None, "", ":memory:"):
+            # Bağlantılar havuzda tutulur; sayfa önbelleği ve mmap istekler arasında korunur
+            options.update(
+                poolclass=QueuePool,
+                pool_size=_env_int("DB_POOL_SIZE", 5),
+                max_overflow=_env_int("DB_MAX_OVERFLOW", 10),
+            )
+        return options
+    options = {
+        "pool_size": _env_int("DB_POOL_SIZE", 10),
+        "max_overflow": _env_int("DB_MAX_OVERFLOW", 20),
+        "pool_timeout": _env_int("DB_POOL_TIMEOUT", 30),
+        "pool_recycle": _env_int("DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", True),
+    }
+    if backend == "postgresql":
+        timeout_ms = _env_int("DB_STATEMENT_TIMEOUT_MS", 30000)
+        if timeout_ms > 0:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout_ms}"}
+    return options
+
+
+def create_app_engine(url):
+    """Engine for ``url`` with its backend profile; SQLite pragmas are set via connect events."""
+    url_obj = make_url(url)
+    if url_obj.get_backend_name() == "sqlite" and url_obj.database not in (None, "", ":memory:"):
+        # Veritabanı klasörünü kontrol et ve oluştur
+        os.makedirs(os.path.dirname(os.path.abspath(url_obj.database)), exist_ok=True)
+    engine = create_engine(url, **engine_options(url))
+    if url_obj.get_backend_name() == "sqlite":
+        pragmas = sqlite_pragmas()
+
+        @event.listens_for(engine, "connect")
+        def _set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+    return engine
+
+
+engine = create_app_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
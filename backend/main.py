@@ -1,7 +1,7 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from database import init_db
+from database import init_db, SessionLocal
 from app.api.endpoints.courses import router as courses_router
 from app.api.endpoints.teachers import router as teachers_router
 from app.api.endpoints.schedules import router as schedules_router
@@ -11,6 +11,7 @@ from app.api.endpoints.statistics import router as statistics_router
 from app.api.endpoints.notifications import router as notifications_router
 from app.api.endpoints.schedule import router as schedule_router
 from app.api.endpoints.scheduler import router as scheduler_router
+from services.scheduling.jobs import job_manager
 import time
 import logging
 from dotenv import load_dotenv
@@ -65,6 +66,13 @@ async def general_exception_handler(request: Request, exc: Exception):
 # Veritabanını başlat
 init_db()
 
+# Önceki çalıştırmadan sahipsiz kalan işleri kapat
+_db = SessionLocal()
+try:
+    job_manager.recover(_db)
+finally:
+    _db.close()
+
 # Router'ları dahil et
 app.include_router(courses_router, prefix="/api/courses", tags=["Courses"])
 app.include_router(teachers_router, prefix="/api/teachers", tags=["Teachers"])
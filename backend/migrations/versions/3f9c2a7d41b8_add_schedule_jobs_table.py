@@ -0,0 +1,40 @@
+"""add schedule_jobs table
+
+Revision ID: 3f9c2a7d41b8
+Revises: e57e1e590908
+Create Date: 2026-10-18 09:40:12.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2a7d41b8'
+down_revision = 'e57e1e590908'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('schedule_jobs',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('params', sa.Text(), nullable=True),
+    sa.Column('generation', sa.Integer(), nullable=True),
+    sa.Column('best_fitness', sa.Integer(), nullable=True),
+    sa.Column('elapsed_seconds', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('result', sa.Text(), nullable=True),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_schedule_jobs_id'), 'schedule_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_schedule_jobs_status'), 'schedule_jobs', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_schedule_jobs_status'), table_name='schedule_jobs')
+    op.drop_index(op.f('ix_schedule_jobs_id'), table_name='schedule_jobs')
+    op.drop_table('schedule_jobs')
@@ -0,0 +1,29 @@
+"""add schedule job ownership
+
+Revision ID: 7d2e9a4c6f13
+Revises: e5a7c3b9d210
+Create Date: 2026-10-18 19:12:44.306518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2e9a4c6f13'
+down_revision = 'e5a7c3b9d210'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('schedule_jobs', sa.Column('owner', sa.String(), nullable=True))
+    op.add_column('schedule_jobs', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+    op.add_column('schedule_jobs', sa.Column('cancel_requested', sa.Boolean(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('schedule_jobs') as batch_op:
+        batch_op.drop_column('cancel_requested')
+        batch_op.drop_column('heartbeat_at')
+        batch_op.drop_column('owner')
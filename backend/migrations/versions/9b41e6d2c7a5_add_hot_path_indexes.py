@@ -0,0 +1,40 @@
+"""add hot path indexes
+
+Revision ID: 9b41e6d2c7a5
+Revises: 3f9c2a7d41b8
+Create Date: 2026-10-18 14:05:37.204611
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b41e6d2c7a5'
+down_revision = '3f9c2a7d41b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_schedule_day_classroom_id', 'schedule', ['day', 'classroom_id'], unique=False)
+    op.create_index(op.f('ix_schedule_course_id'), 'schedule', ['course_id'], unique=False)
+    op.create_index(op.f('ix_schedule_classroom_id'), 'schedule', ['classroom_id'], unique=False)
+    op.create_index(op.f('ix_courses_is_active'), 'courses', ['is_active'], unique=False)
+    op.create_index(op.f('ix_courses_teacher_id'), 'courses', ['teacher_id'], unique=False)
+    op.create_index(op.f('ix_course_sessions_course_id'), 'course_sessions', ['course_id'], unique=False)
+    op.create_index(op.f('ix_course_departments_course_id'), 'course_departments', ['course_id'], unique=False)
+    op.create_index(
+        'ix_course_departments_department_course_id', 'course_departments', ['department', 'course_id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_course_departments_department_course_id', table_name='course_departments')
+    op.drop_index(op.f('ix_course_departments_course_id'), table_name='course_departments')
+    op.drop_index(op.f('ix_course_sessions_course_id'), table_name='course_sessions')
+    op.drop_index(op.f('ix_courses_teacher_id'), table_name='courses')
+    op.drop_index(op.f('ix_courses_is_active'), table_name='courses')
+    op.drop_index(op.f('ix_schedule_classroom_id'), table_name='schedule')
+    op.drop_index(op.f('ix_schedule_course_id'), table_name='schedule')
+    op.drop_index('ix_schedule_day_classroom_id', table_name='schedule')
@@ -0,0 +1,57 @@
+"""add schedule start/end minute columns
+
+Revision ID: c2d8f4a61e97
+Revises: 9b41e6d2c7a5
+Create Date: 2026-10-18 15:12:08.731940
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2d8f4a61e97'
+down_revision = '9b41e6d2c7a5'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+
+def _parse_time_range(time_range):
+    # models.parse_time_range ile aynı kural; göç, modelin ileride değişmesinden bağımsız kalır
+    try:
+        start, end = (int(h) * 60 + int(m) for h, m in (part.split(':') for part in time_range.split('-')))
+    except (ValueError, AttributeError):
+        return None
+    return (start, end) if end > start else None
+
+
+def upgrade() -> None:
+    op.add_column('schedule', sa.Column('start_minute', sa.Integer(), nullable=True))
+    op.add_column('schedule', sa.Column('end_minute', sa.Integer(), nullable=True))
+    # Mevcut kayıtlar time_range'den doldurulur; geçersiz aralıklar NULL kalır
+    conn = op.get_bind()
+    schedule = sa.table(
+        'schedule', sa.column('id', sa.Integer), sa.column('time_range', sa.String),
+        sa.column('start_minute', sa.Integer), sa.column('end_minute', sa.Integer)
+    )
+    update = schedule.update().where(schedule.c.id == sa.bindparam('row_id')).values(
+        start_minute=sa.bindparam('start'), end_minute=sa.bindparam('end')
+    )
+    rows = conn.execute(sa.select(schedule.c.id, schedule.c.time_range)).fetchall()
+    values = []
+    for row_id, time_range in rows:
+        parsed = _parse_time_range(time_range)
+        if parsed is not None:
+            values.append({'row_id': row_id, 'start': parsed[0], 'end': parsed[1]})
+    for i in range(0, len(values), BATCH_SIZE):
+        conn.execute(update, values[i:i + BATCH_SIZE])
+    op.create_index('ix_schedule_day_start_end', 'schedule', ['day', 'start_minute', 'end_minute'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_schedule_day_start_end', table_name='schedule')
+    with op.batch_alter_table('schedule') as batch_op:
+        batch_op.drop_column('end_minute')
+        batch_op.drop_column('start_minute')
@@ -0,0 +1,94 @@
+"""add teacher availability masks
+
+Revision ID: e5a7c3b9d210
+Revises: c2d8f4a61e97
+Create Date: 2026-10-18 16:40:21.518734
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a7c3b9d210'
+down_revision = 'c2d8f4a61e97'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+
+def _minutes(hhmm):
+    h, m = hhmm.split(':')
+    return int(h) * 60 + int(m)
+
+
+def _compile_working_hours(working_hours, working_days):
+    # models.compile_working_hours ile aynı kural; göç, modelin ileride değişmesinden bağımsız kalır
+    try:
+        hours = json.loads(working_hours or '{}')
+    except ValueError:
+        try:
+            start, end = (_minutes(part) for part in working_hours.split('-'))
+        except (ValueError, AttributeError):
+            return {}
+        first, last = -(-start // SLOT_MINUTES), min(end // SLOT_MINUTES, SLOTS_PER_DAY)
+        mask = ((1 << (last - first)) - 1) << first if last > first >= 0 else 0
+        days = [day.strip().lower() for day in (working_days or '').split(',') if day.strip()]
+        return {day: mask for day in days} if mask else {}
+    if not isinstance(hours, dict):
+        return {}
+    masks = {}
+    for day, marks in hours.items():
+        mask = 0
+        for mark in marks[:-1] if isinstance(marks, list) else ():
+            try:
+                slot = _minutes(mark) // SLOT_MINUTES
+            except (ValueError, AttributeError):
+                continue
+            if 0 <= slot < SLOTS_PER_DAY:
+                mask |= 1 << slot
+        if mask:
+            masks[str(day).lower()] = mask
+    return masks
+
+
+def upgrade() -> None:
+    availability = op.create_table(
+        'teacher_availability',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('teacher_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.String(), nullable=False),
+        sa.Column('available_mask', sa.BigInteger(), nullable=False),
+        sa.Column('unavailable_mask', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['teacher_id'], ['teachers.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('teacher_id', 'day', name='uq_teacher_availability_teacher_day')
+    )
+    op.create_index(op.f('ix_teacher_availability_id'), 'teacher_availability', ['id'], unique=False)
+    op.create_index(op.f('ix_teacher_availability_teacher_id'), 'teacher_availability', ['teacher_id'], unique=False)
+    # Mevcut öğretmenlerin çalışma saatleri bir kez derlenir; ayrıştırılamayanlar satırsız kalır
+    conn = op.get_bind()
+    teachers = sa.table(
+        'teachers', sa.column('id', sa.Integer), sa.column('working_days', sa.String),
+        sa.column('working_hours', sa.String)
+    )
+    values = [
+        {'teacher_id': teacher_id, 'day': day, 'available_mask': mask, 'unavailable_mask': 0}
+        for teacher_id, working_days, working_hours in conn.execute(
+            sa.select(teachers.c.id, teachers.c.working_days, teachers.c.working_hours)
+        ).fetchall()
+        for day, mask in _compile_working_hours(working_hours, working_days).items()
+    ]
+    for i in range(0, len(values), BATCH_SIZE):
+        op.bulk_insert(availability, values[i:i + BATCH_SIZE])
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_teacher_availability_teacher_id'), table_name='teacher_availability')
+    op.drop_index(op.f('ix_teacher_availability_id'), table_name='teacher_availability')
+    op.drop_table('teacher_availability')
@@ -1,7 +1,63 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Enum
-from sqlalchemy.orm import relationship
+import json
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, ForeignKey, Enum, Float, Text, DateTime, Index, UniqueConstraint, event
+from sqlalchemy.orm import Session, relationship, validates
 from database import Base
 
+# Öğretmen müsaitlik maskeleri: bit k = günün k. SLOT_MINUTES dakikalık dilimi
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+def _minutes(hhmm):
+    h, m = hhmm.split(':')
+    return int(h) * 60 + int(m)
+
+def parse_time_range(time_range):
+    """``"HH:MM-HH:MM"`` as a ``(start, end)`` minute pair, or ``None``."""
+    try:
+        start, end = (_minutes(part) for part in time_range.split('-'))
+    except (ValueError, AttributeError):
+        return None
+    return (start, end) if end > start else None
+
+def range_mask(start, end, cover=False):
+    """Slots inside ``[start, end)`` minutes, or every slot touching it if ``cover``."""
+    if cover:
+        first, last = start // SLOT_MINUTES, -(-end // SLOT_MINUTES)
+    else:
+        first, last = -(-start // SLOT_MINUTES), end // SLOT_MINUTES
+    first, last = max(first, 0), min(last, SLOTS_PER_DAY)
+    return ((1 << (last - first)) - 1) << first if last > first else 0
+
+def compile_working_hours(working_hours, working_days=None):
+    """``{day: slot mask}`` of a teacher's working hours (empty if unparseable).
+
+    JSON ``{"monday": ["09:00", "09:30", ...]}``: every listed time except
+    the last one of a day opens a slot. Legacy ``"09:00-17:00"``: every
+    slot inside the range on each of the comma separated ``working_days``.
+    """
+    try:
+        hours = json.loads(working_hours or '{}')
+    except ValueError:
+        parsed = parse_time_range(working_hours)
+        mask = range_mask(*parsed) if parsed else 0
+        days = [day.strip().lower() for day in (working_days or '').split(',') if day.strip()]
+        return {day: mask for day in days} if mask else {}
+    if not isinstance(hours, dict):
+        return {}
+    masks = {}
+    for day, marks in hours.items():
+        mask = 0
+        for mark in marks[:-1] if isinstance(marks, list) else ():
+            try:
+                slot = _minutes(mark) // SLOT_MINUTES
+            except (ValueError, AttributeError):
+                continue
+            if 0 <= slot < SLOTS_PER_DAY:
+                mask |= 1 << slot
+        if mask:
+            masks[str(day).lower()] = mask
+    return masks
+
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, index=True)
@@ -19,13 +75,68 @@ class Teacher(Base):
     working_days = Column(String)
     working_hours = Column(String)
     courses = relationship("Course", back_populates="teacher")
+    availability = relationship("TeacherAvailability", back_populates="teacher", cascade="all, delete-orphan")
+
+    @validates("working_days", "working_hours")
+    def _compile_availability(self, key, value):
+        # Çalışma saatleri yazılırken bir kez derlenir; çözücüler hazır maskeleri okur
+        fields = {"working_days": self.working_days, "working_hours": self.working_hours, key: value}
+        self._set_masks("available_mask", compile_working_hours(fields["working_hours"], fields["working_days"]))
+        return value
+
+    def set_unavailable_masks(self, masks):
+        """Replace the teacher's blocked slots with ``{day: mask}``."""
+        self._set_masks("unavailable_mask", masks)
+
+    def _set_masks(self, column, masks):
+        rows = {row.day: row for row in self.availability}
+        for day in set(rows) | set(masks):
+            row = rows.get(day)
+            if row is None:
+                row = TeacherAvailability(day=day, available_mask=0, unavailable_mask=0)
+                self.availability.append(row)
+            # Boşalan satır burada silinmez, sıfırlanır; alanlar tek tek atanırken ara durumda
+            # silinip yeniden eklenen gün aynı flush'ta benzersizlik kısıtını bozardı
+            setattr(row, column, masks.get(day, 0))
+
+    @property
+    def availability_masks(self):
+        """Effective ``{day: slot mask}``: working slots minus blocked ones."""
+        masks = {row.day: row.available_mask & ~row.unavailable_mask for row in self.availability}
+        return {day: mask for day, mask in masks.items() if mask}
+
+class TeacherAvailability(Base):
+    __tablename__ = "teacher_availability"
+    # Öğretmen başına gün başına tek satır; bit k = k. 30 dakikalık dilim
+    __table_args__ = (UniqueConstraint("teacher_id", "day", name="uq_teacher_availability_teacher_day"),)
+    id = Column(Integer, primary_key=True, index=True)
+    teacher_id = Column(Integer, ForeignKey("teachers.id"), index=True, nullable=False)
+    day = Column(String, nullable=False)  # küçük harf: 'monday', ...
+    available_mask = Column(BigInteger, nullable=False, default=0)  # working_hours'tan derlenir
+    unavailable_mask = Column(BigInteger, nullable=False, default=0)  # PUT /unavailable-times ile
+    teacher = relationship("Teacher", back_populates="availability")
+
+@event.listens_for(Session, "before_flush")
+def _drop_empty_availability(session, flush_context, instances):
+    # Son değerler flush anında bellidir: iki maskesi de boş kalan gün satırları atılır
+    for row in [obj for obj in (*session.new, *session.dirty) if isinstance(obj, TeacherAvailability)]:
+        if row.available_mask or row.unavailable_mask:
+            continue
+        pending = row in session.new
+        if row.teacher is not None and row in row.teacher.availability:
+            row.teacher.availability.remove(row)
+        if pending:
+            if row in session:
+                session.expunge(row)
+        else:
+            session.delete(row)
 
 class Course(Base):
     __tablename__ = "courses"
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
     code = Column(String, unique=True)
-    teacher_id = Column(Integer, ForeignKey("teachers.id"))
+    teacher_id = Column(Integer, ForeignKey("teachers.id"), index=True)
     faculty = Column(String)
     level = Column(String)
     type = Column(String, default="Core")  # 'Core', 'Lab', 'Elective' vs.
@@ -33,7 +144,7 @@ class Course(Base):
     semester = Column(String)
     ects = Column(Integer)
     total_hours = Column(Integer, default=2)  # Dersin toplam saat süresi
-    is_active = Column(Boolean, default=True)
+    is_active = Column(Boolean, default=True, index=True)
     student_count = Column(Integer, default=0)  # Dersi alan öğrenci sayısı
     teacher = relationship("Teacher", back_populates="courses")
     schedules = relationship("Schedule", back_populates="course")
@@ -52,26 +163,58 @@ class Classroom(Base):
 
 class Schedule(Base):
     __tablename__ = "schedule"
+    # Gün bazlı silme ve derslik/gün çakışma sorguları için
+    __table_args__ = (
+        Index("ix_schedule_day_classroom_id", "day", "classroom_id"),
+        # Zaman aralığı çakışma sorguları: day = ? AND start_minute < :end AND end_minute > :start
+        Index("ix_schedule_day_start_end", "day", "start_minute", "end_minute"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     day = Column(String)
     time_range = Column(String)
-    course_id = Column(Integer, ForeignKey("courses.id"))
-    classroom_id = Column(Integer, ForeignKey("classrooms.id"))
+    # time_range'den türetilir (gece yarısından itibaren dakika); geçersiz aralıkta NULL
+    start_minute = Column(Integer)
+    end_minute = Column(Integer)
+    course_id = Column(Integer, ForeignKey("courses.id"), index=True)
+    classroom_id = Column(Integer, ForeignKey("classrooms.id"), index=True)
     course = relationship("Course", back_populates="schedules")
     classroom = relationship("Classroom", back_populates="schedules")
 
+    @validates("time_range")
+    def _sync_minutes(self, key, time_range):
+        self.start_minute, self.end_minute = parse_time_range(time_range) or (None, None)
+        return time_range
+
 class CourseSession(Base):
     __tablename__ = "course_sessions"
     id = Column(Integer, primary_key=True, index=True)
-    course_id = Column(Integer, ForeignKey("courses.id"))
+    course_id = Column(Integer, ForeignKey("courses.id"), index=True)
     type = Column(String)  # 'teorik' or 'lab'
     hours = Column(Integer)  # Duration of this session in hours
     course = relationship("Course", back_populates="sessions")
 
 class CourseDepartment(Base):
     __tablename__ = "course_departments"
+    # Kohort (bölüm, seviye) çakışma sorgusu bölümden derse iner
+    __table_args__ = (Index("ix_course_departments_department_course_id", "department", "course_id"),)
     id = Column(Integer, primary_key=True, index=True)
-    course_id = Column(Integer, ForeignKey("courses.id"))
+    course_id = Column(Integer, ForeignKey("courses.id"), index=True)
     department = Column(String)
     student_count = Column(Integer, default=0)  # Bu bölümden dersi alan öğrenci sayısı
     course = relationship("Course", back_populates="departments")
+
+class ScheduleJob(Base):
+    __tablename__ = "schedule_jobs"
+    id = Column(String, primary_key=True, index=True)
+    status = Column(String, index=True)  # 'running', 'saving', 'completed', 'failed' veya 'cancelled'
+    params = Column(Text)  # JSON
+    generation = Column(Integer, default=0)
+    best_fitness = Column(Integer, default=0)
+    elapsed_seconds = Column(Float)
+    created_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    result = Column(Text)  # JSON, yalnızca tamamlanan işler için
+    error = Column(String)
+    owner = Column(String)  # İşi çalıştıran API süreci, "host:pid"
+    heartbeat_at = Column(DateTime)  # Sahibinin son yoklaması
+    cancel_requested = Column(Boolean, default=False)  # Sahibi bir sonraki yoklamada işi durdurur
@@ -4,7 +4,9 @@ from database import get_db
 from models import Course, Teacher, Classroom, Schedule, CourseSession
 from datetime import datetime, time
 from typing import List, Dict, Tuple, Any
-import random
+import numpy as np
+from services.scheduling.bitset import OccupancyIndex, cohorts
+from services.scheduling.rooms import ClassroomIndex
 
 router = APIRouter()
 
@@ -62,23 +64,15 @@ def get_teacher_availability(teacher):
     return availability
 
 def get_suitable_classrooms(course_type, available_classrooms, student_count):
-    """Get classrooms suitable for the course type and with sufficient capacity"""
-    suitable_rooms = []
-    
-    # Map course types to classroom types
-    type_mapping = {
-        "Lab": ["Lab"],
-        "Theoretical": ["Theoretical"]
-    }
-    
-    matching_types = type_mapping.get(course_type, ["Theoretical"])
-    
-    for classroom in available_classrooms:
-        # Check if classroom type matches and has sufficient capacity
-        if classroom.type in matching_types and classroom.capacity >= student_count:
-            suitable_rooms.append(classroom)
-    
-    return suitable_rooms
+    """Get classrooms suitable for the course type and with sufficient capacity
+
+    ``available_classrooms`` is a ``ClassroomIndex``; a plain list is still
+    accepted and indexed first. Types are matched on their normalised
+    Turkish/English aliases, so "Lab" also finds "laboratuvar" rooms.
+    """
+    if not isinstance(available_classrooms, ClassroomIndex):
+        available_classrooms = ClassroomIndex(available_classrooms)
+    return available_classrooms.suitable(course_type, student_count)
 
 def get_course_sessions(course, db):
     """Get all sessions for a course, sorted by type (theoretical first, then lab)"""
@@ -87,33 +81,22 @@ def get_course_sessions(course, db):
     ).order_by(CourseSession.type).all()
     return sessions
 
-def is_conflict(schedule_entries, day, time_slot, teacher_id, classroom_id, departments, level):
-    """Check if there's a scheduling conflict with the given parameters"""
-    start, end = time_slot.split('-')
-    
-    for entry in schedule_entries:
-        if entry['day'] != day:
-            continue
-            
-        entry_start, entry_end = entry['time_slot'].split('-')
-        
-        # Time conflict check
-        if (start <= entry_end and end >= entry_start):
-            # Same teacher conflict
-            if entry['teacher_id'] == teacher_id:
-                return True
-                
-            # Same classroom conflict
-            if entry['classroom_id'] == classroom_id:
-                return True
-                
-            # Same department and level conflict
-            if any(dept in entry['departments'] for dept in departments) and entry['level'] == level:
-                return True
-                
-    return False
+def is_conflict(occupancy, day, time_slot, teacher_id, classroom_id, departments, level):
+    """Check if there's a scheduling conflict with the given parameters
+
+    ``occupancy`` is an ``OccupancyIndex``; a list of schedule entries is
+    still accepted and indexed first. Ranges conflict when they overlap or
+    touch (``start <= other_end and end >= other_start``, the previous
+    string comparison): ``margin=1`` widens the range by one minute cell,
+    so a gap of a single minute is already free.
+    """
+    if not isinstance(occupancy, OccupancyIndex):
+        occupancy = OccupancyIndex.from_entries(occupancy)
+    return not occupancy.is_free(
+        day, time_slot, teacher_id, classroom_id, cohorts(departments, level), margin=1
+    )
 
-def schedule_course_sessions(course, teacher, teacher_days, suitable_time_slots, suitable_classrooms, schedule_entries, db):
+def schedule_course_sessions(course, teacher, teacher_days, suitable_time_slots, suitable_classrooms, schedule_entries, db, occupancy=None, rng=None):
     """Schedule all sessions for a course"""
     sessions = get_course_sessions(course, db)
     if not sessions:
@@ -123,6 +106,10 @@ def schedule_course_sessions(course, teacher, teacher_days, suitable_time_slots,
     departments = [dept.department for dept in course.departments]
     if not departments:
         return False, "Course has no departments assigned"
+    if occupancy is None:
+        occupancy = OccupancyIndex.from_entries(schedule_entries)
+    if rng is None:
+        rng = np.random.default_rng()
     
     # Sort sessions to ensure theoretical sessions come before lab sessions
     sessions.sort(key=lambda x: 0 if x.type == "teorik" else 1)
@@ -130,7 +117,7 @@ def schedule_course_sessions(course, teacher, teacher_days, suitable_time_slots,
     scheduled_sessions = []
     for session in sessions:
         session_scheduled = False
-        random.shuffle(teacher_days)
+        rng.shuffle(teacher_days)
         
         # Get suitable time slots for this specific session
         session_suitable_time_slots = []
@@ -147,7 +134,7 @@ def schedule_course_sessions(course, teacher, teacher_days, suitable_time_slots,
             if session_scheduled:
                 break
                 
-            random.shuffle(session_suitable_time_slots)
+            rng.shuffle(session_suitable_time_slots)
             for time_slot in session_suitable_time_slots:
                 if session_scheduled:
                     break
@@ -162,7 +149,7 @@ def schedule_course_sessions(course, teacher, teacher_days, suitable_time_slots,
                 if not session_suitable_classrooms:
                     return False, f"{session.type} oturumu için uygun derslik yok"
                 
-                random.shuffle(session_suitable_classrooms)
+                rng.shuffle(session_suitable_classrooms)
                 for classroom in session_suitable_classrooms:
                     # For lab sessions, check if theoretical session is already scheduled
                     if session.type == "lab":
@@ -174,7 +161,7 @@ def schedule_course_sessions(course, teacher, teacher_days, suitable_time_slots,
                             continue
                     
                     if not is_conflict(
-                        schedule_entries, day, time_slot, 
+                        occupancy, day, time_slot,
                         teacher.id, classroom.id, departments, course.level
                     ):
                         new_schedule = Schedule(
@@ -184,6 +171,7 @@ def schedule_course_sessions(course, teacher, teacher_days, suitable_time_slots,
                             classroom_id=classroom.id
                         )
                         db.add(new_schedule)
+                        occupancy.reserve(day, time_slot, teacher.id, classroom.id, cohorts(departments, course.level))
                         schedule_entries.append({
                             "day": day,
                             "time_slot": time_slot,
@@ -245,8 +233,11 @@ def calculate_duration(time_range):
     return (end_minutes - start_minutes) / 60
 
 @router.post("/generate")
-async def generate_schedule(db: Session = Depends(get_db)):
-    """Generate a complete class schedule"""
+async def generate_schedule(seed: int = None, db: Session = Depends(get_db)):
+    """Generate a complete class schedule
+
+    ``seed`` makes the random day, slot and classroom order reproducible.
+    """
     try:
         # 1. Preprocessing
         active_courses = db.query(Course).filter(Course.is_active == True).options(
@@ -276,6 +267,9 @@ async def generate_schedule(db: Session = Depends(get_db)):
         )
         
         schedule_entries = []
+        occupancy = OccupancyIndex()
+        classroom_index = ClassroomIndex(classrooms)
+        rng = np.random.default_rng(seed)
         unscheduled_courses = []
         time_slots = get_time_slots()
         
@@ -293,13 +287,13 @@ async def generate_schedule(db: Session = Depends(get_db)):
             # Get all possible time slots
             suitable_time_slots = [f"{start}-{end}" for start, end in time_slots]
             
-            # Get all possible classrooms
-            suitable_classrooms = classrooms
+            # Get all possible classrooms (indexed once for the whole run)
+            suitable_classrooms = classroom_index
             
             # Schedule all sessions for the course
             success, message = schedule_course_sessions(
                 course, teacher, teacher_days, suitable_time_slots, 
-                suitable_classrooms, schedule_entries, db
+                suitable_classrooms, schedule_entries, db, occupancy, rng
             )
             
             if not success:
@@ -1,7 +1,8 @@
 from sqlalchemy.orm import Session, joinedload
-from models import Schedule, Course, Classroom
+from models import Schedule, Course, Classroom, CourseDepartment, parse_time_range
 from fastapi import HTTPException, status
 from schemas.schedule import ScheduleCreate
+from services.scheduling.rooms import ClassroomIndex
 
 def get_all_schedules(db: Session):
     return db.query(Schedule).options(
@@ -15,20 +16,95 @@ def get_schedule_by_id(schedule_id: int, db: Session):
         joinedload(Schedule.classroom)
     ).filter(Schedule.id == schedule_id).first()
 
-def create_schedule(schedule: ScheduleCreate, db: Session):
-    course = db.query(Course).filter(Course.id == schedule.course_id).first()
+def _day_variants(day):
+    # Kayıtlarda gün adı farklı büyük/küçük harfle tutulabilir
+    return {day, day.lower(), day.lower().capitalize()}
+
+def overlapping_schedules(day: str, start: int, end: int, db: Session):
+    """Query of the entries on ``day`` overlapping ``[start, end)`` minutes.
+
+    Runs as an indexed range query on ``start_minute``/``end_minute``;
+    callers can narrow it further with their own filters.
+    """
+    return db.query(Schedule).filter(
+        Schedule.day.in_(_day_variants(day)),
+        Schedule.start_minute < end,
+        Schedule.end_minute > start
+    )
+
+def _resource_keys(classroom_id, course):
+    keys = [("classroom", classroom_id), ("course", course.id)]
+    if course.teacher_id is not None:
+        keys.append(("teacher", course.teacher_id))
+    keys.extend(("cohort", dept.department, course.level) for dept in course.departments)
+    return keys
+
+def find_schedule_conflicts(schedule: ScheduleCreate, course: Course, db: Session, exclude_id=None):
+    """Entries overlapping ``schedule`` in its classroom, course, teacher or cohorts.
+
+    The database returns only the rows of that day that overlap in time
+    and share the classroom or a related course (same course, teacher or
+    cohort); each is then matched to the shared resources. Returns
+    ``(resource kind, Schedule)`` pairs.
+    """
+    start, end = parse_time_range(schedule.time_range)
+    related = db.query(Course.id).filter(Course.id == course.id)
+    if course.teacher_id is not None:
+        related = related.union(db.query(Course.id).filter(Course.teacher_id == course.teacher_id))
+    departments = [dept.department for dept in course.departments]
+    if departments:
+        related = related.union(
+            db.query(CourseDepartment.course_id)
+            .join(Course, Course.id == CourseDepartment.course_id)
+            .filter(CourseDepartment.department.in_(departments), Course.level == course.level)
+        )
+    query = overlapping_schedules(schedule.day, start, end, db).options(
+        joinedload(Schedule.course).joinedload(Course.departments)
+    ).filter(
+        (Schedule.classroom_id == schedule.classroom_id) | Schedule.course_id.in_(related)
+    ).order_by(Schedule.start_minute)
+    if exclude_id is not None:
+        query = query.filter(Schedule.id != exclude_id)
+    rows = [(row, set(_resource_keys(row.classroom_id, row.course))) for row in query.all() if row.course]
+    return [
+        (key[0], row)
+        for key in _resource_keys(schedule.classroom_id, course)
+        for row, keys in rows if key in keys
+    ]
+
+def find_free_classrooms(day: str, time_range: str, db: Session, room_type=None, min_capacity=0):
+    """Classrooms of ``room_type`` seating ``min_capacity`` that are free on ``day`` in ``time_range``.
+
+    Candidates come from a ``ClassroomIndex`` (smallest fitting room
+    first); the booked ones are found with one overlap range query.
+    """
+    start, end = parse_time_range(time_range)
+    candidates = ClassroomIndex(db.query(Classroom).all()).suitable(room_type, min_capacity)
+    if not candidates:
+        return []
+    booked = {
+        classroom_id for classroom_id, in overlapping_schedules(day, start, end, db)
+        .filter(Schedule.classroom_id.in_([room.id for room in candidates]))
+        .with_entities(Schedule.classroom_id).distinct()
+    }
+    return [room for room in candidates if room.id not in booked]
+
+def _check_schedule(schedule: ScheduleCreate, db: Session, exclude_id=None):
+    course = db.query(Course).options(joinedload(Course.departments)).filter(Course.id == schedule.course_id).first()
     if not course:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Course not found")
     classroom = db.query(Classroom).filter(Classroom.id == schedule.classroom_id).first()
     if not classroom:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Classroom not found")
-    existing_schedule = db.query(Schedule).filter(
-        Schedule.day == schedule.day,
-        Schedule.time_range == schedule.time_range,
-        (Schedule.course_id == schedule.course_id) | (Schedule.classroom_id == schedule.classroom_id)
-    ).first()
-    if existing_schedule:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Schedule conflict detected")
+    if parse_time_range(schedule.time_range) is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid time range")
+    conflicts = find_schedule_conflicts(schedule, course, db, exclude_id)
+    if conflicts:
+        kinds = ", ".join(dict.fromkeys(kind for kind, _ in conflicts))
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Schedule conflict detected ({kinds})")
+
+def create_schedule(schedule: ScheduleCreate, db: Session):
+    _check_schedule(schedule, db)
     new_schedule = Schedule(**schedule.dict())
     db.add(new_schedule)
     db.commit()
@@ -39,20 +115,7 @@ def update_schedule(schedule_id: int, schedule: ScheduleCreate, db: Session):
     db_schedule = db.query(Schedule).filter(Schedule.id == schedule_id).first()
     if not db_schedule:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Schedule not found")
-    course = db.query(Course).filter(Course.id == schedule.course_id).first()
-    if not course:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Course not found")
-    classroom = db.query(Classroom).filter(Classroom.id == schedule.classroom_id).first()
-    if not classroom:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Classroom not found")
-    existing_schedule = db.query(Schedule).filter(
-        Schedule.day == schedule.day,
-        Schedule.time_range == schedule.time_range,
-        (Schedule.course_id == schedule.course_id) | (Schedule.classroom_id == schedule.classroom_id),
-        Schedule.id != schedule_id
-    ).first()
-    if existing_schedule:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Schedule conflict detected")
+    _check_schedule(schedule, db, exclude_id=schedule_id)
     for key, value in schedule.dict().items():
         setattr(db_schedule, key, value)
     db.commit()
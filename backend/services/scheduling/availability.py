@@ -0,0 +1,46 @@
+"""Solver-side helpers for teacher availability masks.
+
+Working hours are compiled once, when a teacher is written, by
+``models.compile_working_hours`` into per-day masks stored in
+``teacher_availability``: bit ``k`` of a day's mask is set when slot ``k``
+(starting at ``k * SLOT_MINUTES`` minutes) can be taught. Solvers read
+these ready masks instead of re-parsing the ``working_hours`` text on
+every run.
+"""
+from models import SLOT_MINUTES, compile_working_hours
+
+DAY_ORDER = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+def slot_starts(mask):
+    """Sorted slot indices set in ``mask``."""
+    starts = []
+    while mask:
+        low = mask & -mask
+        starts.append(low.bit_length() - 1)
+        mask ^= low
+    return starts
+
+
+def mask_ranges(mask):
+    """``"HH:MM-HH:MM"`` runs of consecutive slots set in ``mask``."""
+    ranges = []
+    for slot in slot_starts(mask):
+        if ranges and ranges[-1][1] == slot:
+            ranges[-1][1] = slot + 1
+        else:
+            ranges.append([slot, slot + 1])
+    return [
+        f"{start * SLOT_MINUTES // 60:02d}:{start * SLOT_MINUTES % 60:02d}-"
+        f"{end * SLOT_MINUTES // 60:02d}:{end * SLOT_MINUTES % 60:02d}"
+        for start, end in ranges
+    ]
+
+
+def teacher_masks(teacher):
+    """Effective ``{day: mask}`` of a teacher, snapshot or ORM object."""
+    masks = getattr(teacher, 'availability_masks', None)
+    if masks is None:
+        # Derlenmiş maskesi olmayan düz nesneler (ör. testler) için
+        masks = compile_working_hours(getattr(teacher, 'working_hours', None), getattr(teacher, 'working_days', None))
+    return masks
@@ -0,0 +1,86 @@
+"""Bitmask occupancy of teachers, classrooms and cohorts.
+
+A day is split into cells of ``resolution`` minutes and every resource
+keeps one integer per day whose bit ``k`` is set while cell ``k`` is
+booked. The default one-minute cells keep every range at its exact
+bounds. Checking an interval is then a single AND with its span mask and
+booking or releasing it a single OR / AND-NOT, independent of how many
+entries the timetable already holds.
+"""
+from services.scheduling.fitness import parse_minutes
+
+# Dakika çözünürlüğü: ızgara dışı aralıklar yuvarlanmaz, kısa aralar da doğru ölçülür
+RESOLUTION_MINUTES = 1
+
+
+def span_mask(start, end):
+    """Bits ``start`` up to (excluding) ``end``."""
+    if end <= start:
+        return 0
+    return ((1 << (end - start)) - 1) << start
+
+
+class OccupancyIndex:
+    """Per-day occupancy bitmasks for the greedy scheduler.
+
+    Resources are addressed by teacher id, classroom id and cohort, a
+    cohort being a ``(department, level)`` pair. Reservations are assumed
+    not to overlap on the same resource (the scheduler checks first), so a
+    release simply clears the released bits.
+    """
+
+    def __init__(self, resolution=RESOLUTION_MINUTES):
+        self.resolution = resolution
+        self._masks = {}
+
+    @classmethod
+    def from_entries(cls, schedule_entries, resolution=RESOLUTION_MINUTES):
+        """Index built from the greedy scheduler's entry dicts."""
+        index = cls(resolution)
+        for entry in schedule_entries:
+            index.reserve(
+                entry['day'], entry['time_slot'], entry['teacher_id'], entry['classroom_id'],
+                cohorts(entry['departments'], entry['level'])
+            )
+        return index
+
+    def mask(self, time_slot, margin=0):
+        """Span mask of an ``"HH:MM-HH:MM"`` range, widened by ``margin`` cells."""
+        start, end = (parse_minutes(part) for part in time_slot.split('-'))
+        first = start // self.resolution
+        last = -(-end // self.resolution)
+        return span_mask(max(0, first - margin), last + margin)
+
+    def _keys(self, day, teacher_id, classroom_id, cohort_keys):
+        day = day.lower()
+        keys = []
+        if teacher_id is not None:
+            keys.append(("teacher", teacher_id, day))
+        if classroom_id is not None:
+            keys.append(("classroom", classroom_id, day))
+        keys.extend(("cohort", cohort, day) for cohort in cohort_keys)
+        return keys
+
+    def is_free(self, day, time_slot, teacher_id=None, classroom_id=None, cohort_keys=(), margin=0):
+        mask = self.mask(time_slot, margin)
+        get = self._masks.get
+        return not any(get(key, 0) & mask for key in self._keys(day, teacher_id, classroom_id, cohort_keys))
+
+    def reserve(self, day, time_slot, teacher_id=None, classroom_id=None, cohort_keys=()):
+        mask = self.mask(time_slot)
+        for key in self._keys(day, teacher_id, classroom_id, cohort_keys):
+            self._masks[key] = self._masks.get(key, 0) | mask
+
+    def release(self, day, time_slot, teacher_id=None, classroom_id=None, cohort_keys=()):
+        mask = self.mask(time_slot)
+        for key in self._keys(day, teacher_id, classroom_id, cohort_keys):
+            remaining = self._masks.get(key, 0) & ~mask
+            if remaining:
+                self._masks[key] = remaining
+            else:
+                self._masks.pop(key, None)
+
+
+def cohorts(departments, level):
+    """Cohort keys of a course taught to ``departments`` at ``level``."""
+    return [(department, level) for department in departments]
@@ -0,0 +1,261 @@
+"""Constraint-satisfaction engine for the scheduler.
+
+Every placeable session is a variable whose values are the product of its
+(day, slot start) domain and its suitable classrooms (smallest classroom
+first). Search picks the unassigned variable with the fewest live values
+(MRV, ties broken by degree), forward-checks the teacher, classroom and
+cohort constraints of its neighbours and, when a variable runs out of
+values, backjumps to the deepest variable in its conflict set (FC-CBJ).
+Exhausting the conflict set proves that no complete schedule exists.
+"""
+import time
+import numpy as np
+from services.scheduling.genome import DAY, UNPLACED
+from services.scheduling.delta import OccupancyState, BREAK_SLOTS
+
+
+class CSPSolver:
+    """FC-CBJ search over the variables of one ``SessionTable``.
+
+    Pinned sessions (see ``warmstart.pin_schedule``) are fixed before the
+    search; their forward-checking prunes are never undone.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        n = len(table)
+        self.variables = np.flatnonzero(table.has_domain & ~table.pinned)
+        self.unplaceable = int(np.count_nonzero(~table.has_domain))
+        self.day = [None] * n
+        self.start = [None] * n
+        self.end = [None] * n
+        self.room = [None] * n
+        for i in self.variables:
+            slots = table.domain_slots[i].astype(np.int64)
+            rooms = table.session_rooms[i]
+            # Küçük derslik önce: büyük derslikler sonraki oturumlara kalsın
+            rooms = rooms[np.argsort(table.room_capacity[rooms], kind="stable")]
+            self.day[i] = np.repeat(slots[:, 0], len(rooms))
+            self.start[i] = np.repeat(slots[:, 1], len(rooms))
+            self.end[i] = self.start[i] + int(table.duration_slots[i])
+            self.room[i] = np.tile(rooms, len(slots))
+
+        is_variable = np.zeros(n, dtype=bool)
+        is_variable[self.variables] = True
+        groups = {}
+        for i in self.variables.tolist():
+            groups.setdefault(("teacher", int(table.teacher_index[i])), []).append(i)
+            for cohort in table.session_cohorts[i]:
+                groups.setdefault(("cohort", cohort), []).append(i)
+            for room in table.session_rooms[i].tolist():
+                groups.setdefault(("room", room), []).append(i)
+        self._groups = groups
+        # Öğretmen ve kohort komşuları (derslik komşuluğu değere bağlıdır)
+        self.neighbours = [()] * n
+        degree = np.zeros(n, dtype=np.int64)
+        for i in range(n):
+            keys = [("teacher", int(table.teacher_index[i]))] + [("cohort", c) for c in table.session_cohorts[i]]
+            found = {j for key in keys for j in groups.get(key, ()) if j != i}
+            self.neighbours[i] = tuple(sorted(found))
+            degree[i] = len(found)
+        self.degree = degree
+        self.is_variable = is_variable
+
+    def _candidates(self, v, room):
+        found = set(self.neighbours[v])
+        found.update(self._groups.get(("room", int(room)), ()))
+        found.discard(v)
+        return found
+
+    def _conflicts(self, u, v, day, start, end, room):
+        """Values of ``u`` ruled out by placing ``v`` at (day, start, room)."""
+        table = self.table
+        same_day = self.day[u] == day
+        overlap = same_day & (self.start[u] < end) & (self.end[u] > start)
+        mask = overlap & (self.room[u] == room)
+        if table.teacher_index[u] == table.teacher_index[v]:
+            mask |= overlap
+        if (table.cohort_incidence[u] & table.cohort_incidence[v]).any():
+            mask |= same_day & (self.start[u] < end + BREAK_SLOTS) & (self.end[u] > start - BREAK_SLOTS)
+        return mask
+
+    def solve(self, max_seconds=None):
+        """Search for a complete assignment; returns ``(genome, info)``.
+
+        ``info["stop_reason"]`` is ``"optimal"`` for a complete schedule,
+        ``"infeasible"`` when none exists (some session has an empty domain
+        or the search space is exhausted) and ``"time_limit"`` when
+        ``max_seconds`` ran out first. The genome is then the largest
+        partial assignment found, extended greedily.
+        """
+        table = self.table
+        started = time.time()
+        deadline = started + max_seconds if max_seconds else None
+        genome = table.initial.copy()
+        state = OccupancyState.from_genome(table, genome)
+        pruned = [None] * len(table)
+        tried = [None] * len(table)
+        for i in self.variables:
+            pruned[i] = np.zeros(len(self.day[i]), dtype=np.int32)
+            tried[i] = np.zeros(len(self.day[i]), dtype=bool)
+        sizes = np.zeros(len(table), dtype=np.int64)
+
+        def forward_check(v, day, start, room, log):
+            end = start + int(table.duration_slots[v])
+            for u in self._candidates(v, room):
+                if not unassigned[u]:
+                    continue
+                mask = self._conflicts(u, v, day, start, end, room)
+                if not mask.any():
+                    continue
+                pruned[u][mask] += 1
+                log.append((u, mask))
+                sizes[u] = np.count_nonzero((pruned[u] == 0) & ~tried[u])
+                if not np.any(pruned[u] == 0):
+                    return u
+            return None
+
+        def undo(v, log):
+            for u, mask in log:
+                pruned[u][mask] -= 1
+                past_fc[u].discard(v)
+                sizes[u] = np.count_nonzero((pruned[u] == 0) & ~tried[u])
+
+        unassigned = np.zeros(len(table), dtype=bool)
+        # Sabitlenen oturumlar kalıcı olarak komşu alanlarını daraltır
+        for p in np.flatnonzero(table.pinned):
+            day, start, room = (int(x) for x in genome[p])
+            end = start + int(table.duration_slots[p])
+            for u in self._candidates(p, room):
+                if self.is_variable[u]:
+                    pruned[u][self._conflicts(u, p, day, start, end, room)] += 1
+        for i in self.variables:
+            sizes[i] = np.count_nonzero(pruned[i] == 0)
+        unassigned[self.variables] = True
+
+        past_fc = [set() for _ in range(len(table))]
+        conf = [set() for _ in range(len(table))]
+        fc_log = [None] * len(table)
+        position = {}
+        stack = []
+        best_count, best_genome = -1, genome.copy()
+        nodes = backjumps = 0
+        stop_reason = None
+        degree_weight = int(self.degree.max()) + 1 if len(self.degree) else 1
+        current = None
+
+        def unassign(w):
+            state.remove(table, w, *genome[w])
+            genome[w] = UNPLACED
+            undo(w, fc_log[w])
+            fc_log[w] = None
+            del position[w]
+
+        while True:
+            if current is None:
+                if not unassigned.any():
+                    stop_reason = "optimal"
+                    break
+                if deadline is not None and time.time() >= deadline:
+                    stop_reason = "time_limit"
+                    break
+                # MRV, eşitlikte en yüksek derece
+                key = np.where(unassigned, sizes * degree_weight - self.degree, np.iinfo(np.int64).max)
+                current = int(np.argmin(key))
+                unassigned[current] = False
+            v = current
+            assigned = False
+            sibling_days = set(genome[table.siblings[v], DAY].tolist())
+            while True:
+                live = np.flatnonzero((pruned[v] == 0) & ~tried[v])
+                if not len(live):
+                    break
+                # Aynı dersin oturumu olmayan günler önce denenir
+                preferred = live[~np.isin(self.day[v][live], list(sibling_days))] if sibling_days else live
+                k = int(preferred[0] if len(preferred) else live[0])
+                tried[v][k] = True
+                nodes += 1
+                day, start, room = int(self.day[v][k]), int(self.start[v][k]), int(self.room[v][k])
+                if not state.can_place(table, v, day, start, room):
+                    # Günlük saat sınırı: aynı gün aynı kohorttaki atamalar sorumlu
+                    conf[v].update(
+                        u for u in self.neighbours[v]
+                        if u in position and genome[u, DAY] == day
+                        and (table.cohort_incidence[u] & table.cohort_incidence[v]).any()
+                    )
+                    continue
+                log = []
+                wiped = forward_check(v, day, start, room, log)
+                if wiped is not None:
+                    conf[v].update(past_fc[wiped])
+                    undo(v, log)
+                    continue
+                for u, _ in log:
+                    past_fc[u].add(v)
+                genome[v] = (day, start, room)
+                state.place(table, v, day, start, room)
+                fc_log[v] = log
+                position[v] = len(stack)
+                stack.append(v)
+                assigned = True
+                break
+            if assigned:
+                if len(stack) > best_count:
+                    best_count, best_genome = len(stack), genome.copy()
+                current = None
+                continue
+            # Değerler tükendi: çatışma kümesindeki en derin değişkene geri atla
+            culprits = (conf[v] | past_fc[v]) & position.keys()
+            tried[v][:] = False
+            conf[v] = set()
+            unassigned[v] = True
+            sizes[v] = np.count_nonzero(pruned[v] == 0)
+            if not culprits:
+                stop_reason = "infeasible"
+                break
+            if deadline is not None and time.time() >= deadline:
+                stop_reason = "time_limit"
+                break
+            h = max(culprits, key=position.get)
+            while stack[-1] != h:
+                w = stack.pop()
+                unassign(w)
+                tried[w][:] = False
+                conf[w] = set()
+                unassigned[w] = True
+                sizes[w] = np.count_nonzero(pruned[w] == 0)
+            stack.pop()
+            unassign(h)
+            conf[h] |= culprits - {h}
+            current = h
+            backjumps += 1
+
+        if stop_reason == "optimal":
+            best_genome = genome.copy()
+        if self.unplaceable and stop_reason == "optimal":
+            stop_reason = "infeasible"
+        final = OccupancyState.from_genome(table, best_genome)
+        if stop_reason != "optimal":
+            # Kısmi çözüm: kalan oturumlar ilk uygun değere açgözlü yerleştirilir
+            for i in self.variables[best_genome[self.variables, DAY] < 0]:
+                for k in range(len(self.day[i])):
+                    value = (int(self.day[i][k]), int(self.start[i][k]), int(self.room[i][k]))
+                    if final.can_place(table, i, *value):
+                        final.place(table, i, *value)
+                        best_genome[i] = value
+                        break
+        info = {
+            "stop_reason": stop_reason,
+            "proven_infeasible": stop_reason == "infeasible",
+            "unplaceable_sessions": self.unplaceable,
+            "nodes": nodes,
+            "backjumps": backjumps,
+            "elapsed_seconds": round(time.time() - started, 3),
+            "best_fitness": int(final.score()),
+        }
+        return best_genome, info
+
+
+def solve_csp(table, max_seconds=None):
+    """Solve ``table`` with ``CSPSolver``; returns ``(genome, info)``."""
+    return CSPSolver(table).solve(max_seconds)
@@ -0,0 +1,190 @@
+"""Decomposition of a scheduling problem into independent parts.
+
+Two sessions interact only through a shared teacher, a shared cohort or a
+classroom both could use. The connected components of that
+resource-sharing graph can therefore be solved separately: a schedule
+that is valid for every component is valid for the whole problem, and
+each GA only searches its own, much smaller genome. Components are solved
+in worker processes and their genomes are written back into one genome of
+the full table.
+"""
+from concurrent.futures import ProcessPoolExecutor, wait
+from contextlib import ExitStack
+from functools import partial
+import multiprocessing as mp
+import threading
+import time
+import numpy as np
+from services.scheduling.delta import OccupancyState
+from services.scheduling.evolution import run_genetic, resolve_seed
+from services.scheduling.penalty import PenaltyModel
+
+STOP_PRIORITY = ("cancelled", "time_limit", "stalled", "generations", "optimal")
+
+
+def components(table):
+    """Session index arrays of the connected components, largest first.
+
+    Union-find runs over the resources (teachers, cohorts, classrooms):
+    every session joins its own resources, and each distinct classroom
+    set is joined once, so long classroom lists are not rescanned per
+    session.
+    """
+    parent = {}
+
+    def find(key):
+        parent.setdefault(key, key)
+        root = key
+        while parent[root] != root:
+            root = parent[root]
+        while parent[key] != root:
+            parent[key], key = root, parent[key]
+        return root
+
+    def union(a, b):
+        a, b = find(a), find(b)
+        if a != b:
+            parent[b] = a
+
+    room_sets = set()
+    for i in range(len(table)):
+        teacher = ("teacher", int(table.teacher_index[i]))
+        find(teacher)
+        for cohort in table.session_cohorts[i]:
+            union(teacher, ("cohort", cohort))
+        rooms = tuple(table.session_rooms[i].tolist())
+        if rooms:
+            union(teacher, ("room", rooms[0]))
+            room_sets.add(rooms)
+    for rooms in room_sets:
+        for room in rooms[1:]:
+            union(("room", rooms[0]), ("room", room))
+    roots = {}
+    for i in range(len(table)):
+        roots.setdefault(find(("teacher", int(table.teacher_index[i]))), []).append(i)
+    groups = [np.array(group, dtype=np.int64) for group in roots.values()]
+    return sorted(groups, key=len, reverse=True)
+
+
+def component_seed(seed_sequence, k):
+    """Integer seed of component ``k``, independent of the solve order."""
+    child = np.random.SeedSequence(seed_sequence.entropy, spawn_key=tuple(seed_sequence.spawn_key) + (k,))
+    return int(child.generate_state(1, np.uint64)[0])
+
+
+# Süresi dolmuş bileşenler yine de bir nesil (başlangıç popülasyonu) çalışır
+MIN_COMPONENT_SECONDS = 0.001
+# Havuzdaki bileşenlerin ilerlemesi ve iptal bu aralıkla (saniye) yoklanır
+POLL_SECONDS = 0.2
+
+
+def _post(board, k, generation, best):
+    board[k] = (generation, best)
+
+
+def _forward(progress, board, stop):
+    # Bileşenler tek bir ilerleme olarak bildirilir: en ileri nesil ve toplam uygunluk
+    if board and progress(max(g for g, _ in board.values()), sum(b for _, b in board.values())) is False:
+        stop.set()
+
+
+def _solve_component(table, seed, params, deadline, stop=None, report=None):
+    if stop is not None and stop.is_set():
+        # İptalden sonra kalan bileşenler başlangıç popülasyonunu bile kurmaz
+        info = {"stop_reason": "cancelled", "generations_run": 0, "best_fitness": 0, "evaluations": 0, "cache_hits": 0}
+        return table.new_genome(), info
+    if deadline is not None:
+        # Bileşen, başladığı anda ortak süre sınırından kalan süreyi alır
+        params = {**params, "max_seconds": max(deadline - time.time(), MIN_COMPONENT_SECONDS)}
+    if stop is not None:
+        def progress(generation, best):
+            if report is not None:
+                report(generation, best)
+            return not stop.is_set()
+        params = {**params, "progress": progress}
+    return run_genetic(table, seed=seed, **params)
+
+
+def run_decomposed(table, seed=None, workers=None, progress=None, **params):
+    """Solve every component with ``run_genetic`` and merge the genomes.
+
+    ``workers`` processes solve components side by side (inside a worker
+    the GA itself runs serially); the remaining ``params`` are passed to
+    each ``run_genetic`` call. ``max_seconds`` is one wall-clock budget
+    for the whole solve: a component gets whatever is left of it when it
+    starts, so queued or serial components cannot add up past the limit.
+    The island model does not apply per component; ``islands > 1`` raises
+    ``ValueError``. ``progress(generation, best)`` sees the furthest
+    component generation and the summed component fitness; in the worker
+    pool it is polled every ``POLL_SECONDS``. Once it returns ``False``
+    the running components stop at their next generation and the
+    remaining ones are skipped. Returns ``(genome, info)`` like
+    ``run_genetic`` with per-component details under ``components``.
+    """
+    started = time.time()
+    if (params.get("islands") or 1) > 1:
+        raise ValueError("islands cannot be combined with decomposition")
+    max_seconds = params.pop("max_seconds", None)
+    deadline = started + max_seconds if max_seconds else None
+    parts = components(table)
+    seed = resolve_seed(seed)
+    seed_sequence = np.random.SeedSequence(seed)
+    seeds = [component_seed(seed_sequence, k) for k in range(len(parts))]
+    params = {**params, "workers": None, "islands": 1}
+    subtables = [table.subset(part) for part in parts]
+    if workers and workers > 1 and len(parts) > 1:
+        with ExitStack() as stack:
+            # Geri çağrı havuza gönderilemez: iptal ve ilerleme yönetici süreci üzerinden paylaşılır
+            manager = stack.enter_context(mp.Manager()) if progress is not None else None
+            stop = manager.Event() if manager is not None else None
+            board = manager.dict() if manager is not None else None
+            pool = stack.enter_context(ProcessPoolExecutor(max_workers=min(workers, len(parts))))
+            futures = [
+                pool.submit(_solve_component, sub, s, params, deadline, stop,
+                            partial(_post, board, k) if board is not None else None)
+                for k, (sub, s) in enumerate(zip(subtables, seeds))
+            ]
+            pending = futures
+            while pending:
+                _, pending = wait(pending, timeout=POLL_SECONDS if progress is not None else None)
+                if progress is not None:
+                    _forward(progress, dict(board), stop)
+            results = [future.result() for future in futures]
+    else:
+        stop = threading.Event() if progress is not None else None
+        board = {}
+
+        def report_for(k):
+            def report(generation, best):
+                _post(board, k, generation, best)
+                _forward(progress, board, stop)
+            return report
+
+        results = [
+            _solve_component(sub, s, params, deadline, stop, report_for(k) if progress is not None else None)
+            for k, (sub, s) in enumerate(zip(subtables, seeds))
+        ]
+
+    genome = table.new_genome()
+    for part, (sub_genome, _) in zip(parts, results):
+        genome[part] = sub_genome
+    reasons = {info["stop_reason"] for _, info in results}
+    info = {
+        # En kısıtlayıcı bileşenin durma nedeni raporlanır
+        "stop_reason": min(reasons, key=STOP_PRIORITY.index, default="optimal"),
+        "generations_run": max((info["generations_run"] for _, info in results), default=0),
+        "elapsed_seconds": round(time.time() - started, 3),
+        "best_fitness": int(OccupancyState.from_genome(table, genome).score()),
+        "evaluations": sum(info["evaluations"] for _, info in results),
+        "cache_hits": sum(info["cache_hits"] for _, info in results),
+        "seed": seed,
+        "components": [
+            {"sessions": len(part), "stop_reason": info["stop_reason"], "best_fitness": info["best_fitness"]}
+            for part, (_, info) in zip(parts, results)
+        ],
+    }
+    if params.get("soft_weights") is not None:
+        penalty = PenaltyModel(table, params["soft_weights"])
+        info["penalty"] = round(float(penalty.costs(genome)[0]), 3)
+        info["penalty_terms"] = penalty.breakdown(genome)
+    return genome, info
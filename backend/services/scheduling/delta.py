@@ -0,0 +1,204 @@
+"""Incremental occupancy state and delta fitness for GA individuals.
+
+``OccupancyState`` counts, per teacher, classroom and cohort, how many
+sessions occupy each 30 minute cell of each day. Placing or removing one
+session only touches the cells it covers, and the hard-constraint counters
+are updated on the way, so a mutation costs O(session length) instead of a
+full re-evaluation. Next to the counts every resource keeps one ``uint64``
+bitmask per day of its busy cells (a day has 48 cells), so ``can_place``
+is a handful of AND operations.
+"""
+import numpy as np
+from services.scheduling.genome import DAY, START, ROOM, UNPLACED, SLOT_MINUTES, MAX_DAILY_HOURS, MIN_BREAK_MINUTES
+from services.scheduling.bitset import span_mask
+
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+BREAK_SLOTS = -(-MIN_BREAK_MINUTES // SLOT_MINUTES)
+
+
+def _cleared_mask(cells, start):
+    """Mask of the cells (starting at slot ``start``) whose count is zero."""
+    mask = 0
+    for k in np.flatnonzero(cells == 0).tolist():
+        mask |= 1 << (start + k)
+    return np.uint64(mask)
+
+
+class OccupancyState:
+    """Cell counts and hard-constraint counters for one genome.
+
+    ``conflicts`` is the number of surplus bookings over all cells
+    (a cell used by three sessions of one teacher adds two), so it is zero
+    exactly when no teacher, classroom or cohort is double-booked.
+    """
+
+    def __init__(self, table):
+        n_days = max(1, len(table.days))
+        self.teacher = np.zeros((table.n_teachers, n_days, SLOTS_PER_DAY), dtype=np.int16)
+        self.room = np.zeros((len(table.room_ids), n_days, SLOTS_PER_DAY), dtype=np.int16)
+        self.cohort = np.zeros((table.n_cohorts, n_days, SLOTS_PER_DAY), dtype=np.int16)
+        self.cohort_hours = np.zeros((table.n_cohorts, n_days), dtype=np.float64)
+        self.teacher_bits = np.zeros((table.n_teachers, n_days), dtype=np.uint64)
+        self.room_bits = np.zeros((len(table.room_ids), n_days), dtype=np.uint64)
+        self.cohort_bits = np.zeros((table.n_cohorts, n_days), dtype=np.uint64)
+        self.conflicts = 0
+        self.capacity_violations = 0
+        self.placed = 0
+
+    @classmethod
+    def from_genome(cls, table, genome):
+        state = cls(table)
+        for i in np.flatnonzero(genome[:, DAY] >= 0):
+            state.place(table, i, *genome[i])
+        return state
+
+    def copy(self):
+        state = OccupancyState.__new__(OccupancyState)
+        state.teacher = self.teacher.copy()
+        state.room = self.room.copy()
+        state.cohort = self.cohort.copy()
+        state.cohort_hours = self.cohort_hours.copy()
+        state.teacher_bits = self.teacher_bits.copy()
+        state.room_bits = self.room_bits.copy()
+        state.cohort_bits = self.cohort_bits.copy()
+        state.conflicts = self.conflicts
+        state.capacity_violations = self.capacity_violations
+        state.placed = self.placed
+        return state
+
+    def _apply(self, table, i, day, start, room, delta):
+        s = int(start)
+        e = s + int(table.duration_slots[i])
+        mask = np.uint64(span_mask(s, e))
+        t = table.teacher_index[i]
+        for cells, bits, row in ((self.teacher[t, day, s:e], self.teacher_bits, t),
+                                 (self.room[room, day, s:e], self.room_bits, room)):
+            if delta > 0:
+                self.conflicts += int(np.count_nonzero(cells))
+                cells += 1
+                bits[row, day] |= mask
+            else:
+                cells -= 1
+                still_busy = int(np.count_nonzero(cells))
+                self.conflicts -= still_busy
+                # Çakışma yoksa tüm hücreler boşalmıştır
+                bits[row, day] &= ~mask if not still_busy else ~_cleared_mask(cells, s)
+        cohorts = table.session_cohorts[i]
+        if cohorts:
+            block = self.cohort[cohorts, day, s:e]
+            if delta > 0:
+                self.conflicts += int(np.count_nonzero(block))
+                block += 1
+                self.cohort_bits[cohorts, day] |= mask
+            else:
+                block -= 1
+                still_busy = int(np.count_nonzero(block))
+                self.conflicts -= still_busy
+                if not still_busy:
+                    self.cohort_bits[cohorts, day] &= ~mask
+                else:
+                    for row, cells in zip(cohorts, block):
+                        self.cohort_bits[row, day] &= ~_cleared_mask(cells, s)
+            self.cohort[cohorts, day, s:e] = block
+            self.cohort_hours[cohorts, day] += delta * table.hours[i]
+        if table.room_capacity[room] < table.course_students[i]:
+            self.capacity_violations += delta
+        self.placed += delta
+
+    def place(self, table, i, day, start, room):
+        self._apply(table, i, day, start, room, 1)
+
+    def remove(self, table, i, day, start, room):
+        self._apply(table, i, day, start, room, -1)
+
+    def can_place(self, table, i, day, start, room):
+        """Whether session ``i`` fits without breaking a placement rule.
+
+        The teacher, the classroom and the session's cohorts must be free,
+        cohorts also need ``MIN_BREAK_MINUTES`` around the session, and no
+        cohort may exceed ``MAX_DAILY_HOURS`` that day. Session ``i`` must
+        not be in the state itself.
+        """
+        s = int(start)
+        e = s + int(table.duration_slots[i])
+        mask = np.uint64(span_mask(s, e))
+        if self.teacher_bits[table.teacher_index[i], day] & mask or self.room_bits[room, day] & mask:
+            return False
+        cohorts = table.session_cohorts[i]
+        if cohorts:
+            padded = np.uint64(span_mask(max(0, s - BREAK_SLOTS), min(e + BREAK_SLOTS, SLOTS_PER_DAY)))
+            if (self.cohort_bits[cohorts, day] & padded).any():
+                return False
+            if (self.cohort_hours[cohorts, day] + table.hours[i] > MAX_DAILY_HOURS).any():
+                return False
+        return True
+
+    def score(self):
+        """Placed sessions, or 0 while any hard constraint is violated."""
+        if self.conflicts or self.capacity_violations:
+            return 0
+        return self.placed
+
+
+class Individual:
+    """A genome together with its occupancy state and cached fitness.
+
+    ``fitness`` is ``None`` until the individual is scored and is reset
+    only by a move that actually changes a gene, so copies and unchanged
+    crossover children keep their parent's score. ``penalty`` caches the
+    weighted soft-constraint cost (see ``penalty.PenaltyModel``) the same
+    way.
+    """
+
+    __slots__ = ("genome", "state", "fitness", "penalty")
+
+    def __init__(self, genome, state=None, fitness=None, penalty=None):
+        self.genome = genome
+        self.state = state
+        self.fitness = fitness
+        self.penalty = penalty
+
+    def copy(self):
+        return Individual(
+            self.genome.copy(), self.state.copy() if self.state is not None else None, self.fitness, self.penalty
+        )
+
+    def ensure_state(self, table):
+        if self.state is None:
+            self.state = OccupancyState.from_genome(table, self.genome)
+        return self.state
+
+    def score(self, table):
+        if self.fitness is None:
+            self.fitness = self.ensure_state(table).score()
+        return self.fitness
+
+    def move(self, table, i, day, start, room):
+        """Re-place session ``i`` (or unplace it with ``day=UNPLACED``)."""
+        old = self.genome[i]
+        if old[DAY] == day and (day == UNPLACED or (old[START] == start and old[ROOM] == room)):
+            return
+        state = self.ensure_state(table)
+        if old[DAY] != UNPLACED:
+            state.remove(table, i, *old)
+        if day != UNPLACED:
+            state.place(table, i, day, start, room)
+        self.genome[i] = (day, start, room)
+        self.fitness = None
+        self.penalty = None
+
+    def crossover(self, table, other, cut):
+        """One-point crossover on the session axis.
+
+        Each child starts as a copy of one parent and only the tail genes
+        that differ in the other parent are moved, so the child state is
+        patched instead of rebuilt.
+        """
+        children = []
+        for parent, donor in ((self, other), (other, self)):
+            child = Individual(parent.genome.copy(), parent.ensure_state(table).copy(), parent.fitness, parent.penalty)
+            changed = np.flatnonzero((donor.genome[cut:] != parent.genome[cut:]).any(axis=1)) + cut
+            for i in changed:
+                child.move(table, i, *donor.genome[i])
+            children.append(child)
+        return children
@@ -0,0 +1,177 @@
+"""DSatur construction heuristic for instant schedules.
+
+Sessions form a conflict graph: two sessions are adjacent when they share
+a teacher or a cohort (department + level). The graph is kept as
+per-session neighbour arrays built by grouping sessions on teacher and on
+cohort, so it grows with the number of edges rather than sessions squared. Time slots of the sessions'
+domains are the colours. Like DSatur, the next session to colour is the
+one with the fewest colours left (highest saturation), ties broken by the
+number of uncoloured neighbours, and it takes its first free colour.
+
+Classrooms are assigned while colouring with augmenting paths over the
+session-classroom bipartite graph: a session takes its smallest free
+suitable classroom, and when all are busy a session occupying one of them
+is moved to another free classroom to make room.
+"""
+import numpy as np
+from services.scheduling.genome import DAY, START, ROOM
+from services.scheduling.delta import Individual, OccupancyState, BREAK_SLOTS
+from services.scheduling.bitset import span_mask
+
+MAX_AUGMENT_DEPTH = 3
+
+
+def _group(keys):
+    """Sorted session index array per key of ``keys`` (``(session, key)`` pairs)."""
+    groups = {}
+    for i, key in keys:
+        groups.setdefault(key, []).append(i)
+    return {key: np.array(members, dtype=np.int64) for key, members in groups.items()}
+
+
+def conflict_neighbours(table):
+    """Neighbour arrays of the conflict graph and per-edge shares-cohort flags.
+
+    ``neighbours[i]`` holds the sorted sessions sharing a teacher or a
+    cohort with ``i``; ``shares_cohort[i]`` is aligned with it and marks
+    the cohort edges (which also need the minimum break).
+    """
+    teacher_index = table.teacher_index.tolist()
+    by_teacher = _group(enumerate(teacher_index))
+    by_cohort = _group((i, c) for i, cohorts in enumerate(table.session_cohorts) for c in cohorts)
+    # Aynı öğretmen ve kohortlara sahip oturumlar (ör. bir dersin oturumları) aynı komşuluğu paylaşır
+    shared = {}
+    neighbours, shares_cohort = [], []
+    for i, teacher in enumerate(teacher_index):
+        key = (teacher, tuple(sorted(table.session_cohorts[i])))
+        if key not in shared:
+            cohort_mates = np.unique(np.concatenate(
+                [by_cohort[c] for c in key[1]] or [np.empty(0, dtype=np.int64)]
+            ))
+            mates = np.union1d(cohort_mates, by_teacher[teacher])
+            shared[key] = (mates, np.isin(mates, cohort_mates, assume_unique=True))
+        mates, flags = shared[key]
+        keep = mates != i
+        neighbours.append(mates[keep])
+        shares_cohort.append(flags[keep])
+    return neighbours, shares_cohort
+
+
+class DSaturBuilder:
+    """Builds one conflict-free individual for a ``SessionTable``."""
+
+    def __init__(self, table):
+        self.table = table
+        n = len(table)
+        self.variables = np.flatnonzero(table.has_domain & ~table.pinned)
+        self.neighbours, self.shares_cohort = conflict_neighbours(table)
+        self.starts = [None] * n
+        self.days = [None] * n
+        for i in self.variables:
+            slots = table.domain_slots[i].astype(np.int64)
+            self.days[i] = slots[:, 0]
+            self.starts[i] = slots[:, 1]
+        # Derslikler kapasiteye göre artan sırada (en uygun kapasite önce)
+        self.rooms = [
+            rooms[np.argsort(table.room_capacity[rooms], kind="stable")] for rooms in table.session_rooms
+        ]
+
+    def _blocked_by(self, v, u, day, start, shares_cohort):
+        """Colours of ``v`` ruled out by colouring neighbour ``u`` with (day, start)."""
+        table = self.table
+        end = start + int(table.duration_slots[u])
+        ends = self.starts[v] + int(table.duration_slots[v])
+        same_day = self.days[v] == day
+        if shares_cohort:
+            return same_day & (self.starts[v] < end + BREAK_SLOTS) & (ends > start - BREAK_SLOTS)
+        return same_day & (self.starts[v] < end) & (ends > start)
+
+    def _assign_room(self, individual, i, day, start, visited, depth=0):
+        """Free suitable classroom for ``i``, moving other sessions if needed."""
+        table = self.table
+        state = individual.state
+        end = start + int(table.duration_slots[i])
+        mask = np.uint64(span_mask(start, end))
+        for room in self.rooms[i]:
+            if not state.room_bits[room, day] & mask:
+                return int(room)
+        if depth >= MAX_AUGMENT_DEPTH:
+            return None
+        genome = individual.genome
+        starts = genome[:, START].astype(np.int64)
+        ends = starts + table.duration_slots
+        for room in self.rooms[i]:
+            occupants = np.flatnonzero(
+                (genome[:, ROOM] == room) & (genome[:, DAY] == day) & (starts < end) & (ends > start)
+            )
+            if len(occupants) != 1:
+                continue
+            w = int(occupants[0])
+            if w in visited or table.pinned[w]:
+                continue
+            visited.add(w)
+            w_day, w_start, w_room = (int(x) for x in genome[w])
+            state.remove(table, w, w_day, w_start, w_room)
+            # ``w`` eski dersliğine dönemesin diye geçici olarak işaretlenir
+            w_mask = np.uint64(span_mask(w_start, w_start + int(table.duration_slots[w])))
+            state.room_bits[w_room, w_day] |= w_mask
+            other = self._assign_room(individual, w, w_day, w_start, visited, depth + 1)
+            state.room_bits[w_room, w_day] &= ~w_mask
+            if other is not None:
+                state.place(table, w, w_day, w_start, other)
+                genome[w] = (w_day, w_start, other)
+                individual.fitness = individual.penalty = None
+                return int(room)
+            state.place(table, w, w_day, w_start, w_room)
+        return None
+
+    def build(self, rng=None):
+        """Colour every placeable session; ``rng`` randomises tie-breaking."""
+        table = self.table
+        genome = table.initial.copy()
+        individual = Individual(genome, OccupancyState.from_genome(table, genome))
+        state = individual.state
+        blocked = [None] * len(table)
+        for i in self.variables:
+            blocked[i] = np.zeros(len(self.starts[i]), dtype=np.int32)
+        uncoloured = np.zeros(len(table), dtype=bool)
+        uncoloured[self.variables] = True
+        free = np.zeros(len(table), dtype=np.int64)
+        for i in self.variables:
+            free[i] = len(blocked[i])
+        degree = np.array([np.count_nonzero(uncoloured[nb]) for nb in self.neighbours], dtype=np.int64)
+
+        def colour(u, day, start):
+            neighbours = self.neighbours[u]
+            pending = uncoloured[neighbours]
+            for v, shares_cohort in zip(neighbours[pending].tolist(), self.shares_cohort[u][pending].tolist()):
+                blocked[v][self._blocked_by(v, u, day, start, shares_cohort)] += 1
+                free[v] = np.count_nonzero(blocked[v] == 0)
+
+        for p in np.flatnonzero(table.pinned):
+            colour(p, int(genome[p, DAY]), int(genome[p, START]))
+        noise = rng.random(len(table)) if rng is not None else np.zeros(len(table))
+        while uncoloured.any():
+            candidates = np.flatnonzero(uncoloured)
+            # En az renk kalan, eşitlikte en çok boyanmamış komşusu olan oturum
+            v = int(candidates[np.lexsort((noise[candidates], -degree[candidates], free[candidates]))[0]])
+            uncoloured[v] = False
+            degree[self.neighbours[v]] -= 1
+            sibling_days = set(genome[table.siblings[v], DAY].tolist())
+            options = np.flatnonzero(blocked[v] == 0)
+            # Aynı dersin oturumu olmayan günler önce denenir
+            options = sorted(options, key=lambda k: self.days[v][k] in sibling_days)
+            for k in options:
+                day, start = int(self.days[v][k]), int(self.starts[v][k])
+                room = self._assign_room(individual, v, day, start, {v})
+                if room is None or not state.can_place(table, v, day, start, room):
+                    continue
+                individual.move(table, v, day, start, room)
+                colour(v, day, start)
+                break
+        return individual
+
+
+def build_dsatur(table, rng=None):
+    """Shortcut for ``DSaturBuilder(table).build(rng)``."""
+    return DSaturBuilder(table).build(rng)
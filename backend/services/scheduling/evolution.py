@@ -0,0 +1,544 @@
+"""Genetic operators and (optionally parallel) population processing.
+
+Initialisation and mutation draw from a per-individual random stream keyed
+by ``(phase, generation, index)``, so a fixed seed gives the same
+population whether the work runs in this process or is split across a
+``ProcessPoolExecutor``.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import time
+import numpy as np
+from services.scheduling.genome import DAY, ROOM
+from services.scheduling.delta import Individual, OccupancyState
+from services.scheduling.localsearch import improve
+from services.scheduling.dsatur import DSaturBuilder
+from services.scheduling.penalty import PenaltyModel
+
+PHASE_INIT = 0
+PHASE_MUTATION = 1
+PHASE_LOCAL_SEARCH = 2
+PHASE_CONSTRUCTION = 3
+
+
+def resolve_seed(seed):
+    """``seed``, or a fresh random one so an unseeded run can be replayed.
+
+    Fresh seeds stay below 2**53 to survive a round trip through JSON
+    clients that store numbers as doubles.
+    """
+    if seed is None:
+        seed = int(np.random.SeedSequence().generate_state(1, np.uint64)[0] >> np.uint64(11))
+    return seed
+
+
+def individual_rng(seed_sequence, phase, generation, index):
+    """Independent random stream for one individual of one step."""
+    return np.random.default_rng(np.random.SeedSequence(
+        seed_sequence.entropy, spawn_key=tuple(seed_sequence.spawn_key) + (phase, generation, index)
+    ))
+
+
+def construction_seeds(table, seed_sequence, count):
+    """``count`` DSatur individuals to seed a population.
+
+    The first one uses plain DSatur tie-breaking, the others break ties
+    randomly so the seeds differ.
+    """
+    if not count:
+        return []
+    builder = DSaturBuilder(table)
+    return [
+        builder.build(None if k == 0 else individual_rng(seed_sequence, PHASE_CONSTRUCTION, 0, k))
+        for k in range(count)
+    ]
+
+
+def init_individual(table, rng):
+    """Place sessions in table order at the first feasible domain slot.
+
+    Rooms are tried in random order and a course uses each day at most once.
+    Pinned sessions keep their placement from ``table.initial``.
+    """
+    genome = table.initial.copy()
+    state = OccupancyState.from_genome(table, genome)
+    for i in np.flatnonzero(table.has_domain & ~table.pinned):
+        # Aynı dersin başka bir oturumu bu güne atanmışsa atla
+        used_days = set(genome[table.siblings[i], DAY].tolist())
+        placement = _first_feasible(table, state, i, table.domain_slots[i], table.session_rooms, rng, used_days)
+        if placement:
+            genome[i] = placement
+            state.place(table, i, *placement)
+    return Individual(genome, state)
+
+
+def _first_feasible(table, state, i, slots, rooms, rng, skip_days=()):
+    """First (day, start, room) of ``slots`` that fits into ``state``.
+
+    ``rooms`` is either a fixed classroom index or the per-session room
+    lists, which are then tried in random order for every slot.
+    """
+    for day, start in slots:
+        if day in skip_days:
+            continue
+        candidates = rng.permutation(rooms[i]) if isinstance(rooms, list) else (rooms,)
+        for room in candidates:
+            if state.can_place(table, i, day, start, room):
+                return int(day), int(start), int(room)
+    return None
+
+
+def mutate_individual(table, individual, rng):
+    """Move one placed session and try to repair one unplaced session.
+
+    The moved session keeps its classroom and jumps to a random feasible
+    slot of its domain; pinned sessions never move. Only the affected cells
+    of the occupancy state are touched.
+    """
+    genome = individual.genome
+    placed = np.flatnonzero((genome[:, DAY] >= 0) & ~table.pinned)
+    if len(placed):
+        state = individual.ensure_state(table)
+        i = rng.choice(placed)
+        current = tuple(genome[i])
+        state.remove(table, i, *current)
+        slots = table.domain_slots[i]
+        placement = _first_feasible(table, state, i, slots[rng.permutation(len(slots))], current[ROOM], rng)
+        state.place(table, i, *current)
+        if placement:
+            individual.move(table, i, *placement)
+    repair_individual(table, individual, rng)
+    return individual
+
+
+def repair_individual(table, individual, rng):
+    """Place one random unplaced session at a random feasible domain point."""
+    genome = individual.genome
+    unplaced = np.flatnonzero((genome[:, DAY] < 0) & table.has_domain)
+    if not len(unplaced):
+        return False
+    i = rng.choice(unplaced)
+    slots = table.domain_slots[i]
+    used_days = set(genome[table.siblings[i], DAY].tolist())
+    state = individual.ensure_state(table)
+    placement = _first_feasible(table, state, i, slots[rng.permutation(len(slots))], table.session_rooms, rng, used_days)
+    if not placement:
+        return False
+    individual.move(table, i, *placement)
+    return True
+
+
+def rank(individual, fitness):
+    """Selection key: fitness first, then the lower soft-constraint penalty."""
+    return fitness, -(individual.penalty or 0.0)
+
+
+def best_index(population, fitness_scores):
+    return max(range(len(population)), key=lambda k: rank(population[k], fitness_scores[k]))
+
+
+def evolve(runner, population, rng, generations, pop_size, mutation_rate, first_generation=0, progress=None,
+           fitness_scores=None):
+    """Run tournament selection, one-point crossover and mutation.
+
+    ``rng`` drives the main-process decisions; per-individual work goes
+    through ``runner``. After every generation ``progress(generation,
+    best_fitness)`` is called if given; returning ``False`` stops the run.
+    ``fitness_scores`` of the given population are reused when passed.
+    Returns the final population and its scores.
+
+    Only individuals with a positive fitness take part in tournaments
+    while there are any, and tournaments compare ``rank`` keys: with a
+    penalty model, equally placed schedules are told apart by their soft
+    cost and an all-infeasible population by its ``hard`` term.
+    """
+    table = runner.table
+    if fitness_scores is None:
+        fitness_scores = runner.evaluate(population)
+    for gen in range(first_generation, first_generation + generations):
+        candidates = [(ind, fit) for ind, fit in zip(population, fitness_scores) if fit > 0]
+        if not candidates:
+            candidates = list(zip(population, fitness_scores))
+        selected = []
+        for _ in range(pop_size):
+            i, j = rng.integers(0, len(candidates), 2)
+            (ind_i, fit_i), (ind_j, fit_j) = candidates[i], candidates[j]
+            winner = ind_i if rank(ind_i, fit_i) > rank(ind_j, fit_j) else ind_j
+            # Kopya gerekmez: çaprazlama her zaman yeni birey üretir
+            selected.append(winner)
+        next_population = []
+        for i in range(0, pop_size, 2):
+            parent1 = selected[i]
+            parent2 = selected[(i+1) % pop_size]
+            cut = rng.integers(1, len(table)) if len(table) > 1 else 1
+            next_population.extend(parent1.crossover(table, parent2, cut))
+        # Mutasyon (esnek slot ile, çakışma kontrolüyle)
+        to_mutate = np.flatnonzero(rng.random(len(next_population)) < mutation_rate)
+        population = runner.mutate(next_population, to_mutate, gen)[:pop_size]
+        fitness_scores = runner.evaluate(population)
+        if progress is not None and _report(progress, gen + 1, population, fitness_scores, runner.penalty) is False:
+            break
+    return population, fitness_scores
+
+
+def _report(progress, generation, population, fitness_scores, penalty):
+    if penalty is None or not isinstance(progress, Termination):
+        return progress(generation, max(fitness_scores))
+    k = best_index(population, fitness_scores)
+    return progress(generation, fitness_scores[k], population[k].penalty)
+
+
+# İşçi süreçlerde bir kez kurulan değişmez problem tanımı
+_worker_table = None
+_worker_penalty = None
+
+
+def _init_worker(table, soft_weights=None):
+    global _worker_table, _worker_penalty
+    _worker_table = table
+    _worker_penalty = PenaltyModel(table, soft_weights) if soft_weights is not None else None
+
+
+def _init_chunk(seed_sequence, indices):
+    return [init_individual(_worker_table, individual_rng(seed_sequence, PHASE_INIT, 0, k)) for k in indices]
+
+
+def _mutate_chunk(seed_sequence, generation, items):
+    return [
+        mutate_individual(_worker_table, individual, individual_rng(seed_sequence, PHASE_MUTATION, generation, k))
+        for k, individual in items
+    ]
+
+
+def _chunks(items, n):
+    size = max(1, -(-len(items) // n))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+class PopulationRunner:
+    """Runs initialisation and mutation serially or in a process pool.
+
+    With ``workers`` > 1 the session table is shipped to each worker once
+    through the pool initializer; afterwards only individuals cross process
+    boundaries. Evaluation reads the individuals' delta-maintained counters
+    and always runs in this process; with a ``penalty`` model the costs of
+    all individuals without a cached penalty are computed in one batch.
+    """
+
+    def __init__(self, table, seed_sequence, workers=None, penalty=None):
+        self.table = table
+        self.seed_sequence = seed_sequence
+        self.penalty = penalty
+        self.workers = workers if workers and workers > 1 else None
+        self.evaluations = 0
+        self.cache_hits = 0
+        self._pool = None
+        if self.workers:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker, initargs=(table,)
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _map(self, fn, chunks, *args):
+        results = []
+        for part in self._pool.map(fn, *([arg] * len(chunks) for arg in args), chunks):
+            results.extend(part)
+        return results
+
+    def initialize(self, pop_size, deadline=None, optimum=None):
+        """Build the initial population.
+
+        Serially, building stops early once the wall-clock ``deadline`` has
+        passed or an individual reaches ``optimum``; at least one individual
+        is always returned.
+        """
+        if not self._pool:
+            population = []
+            for k in range(pop_size):
+                individual = init_individual(self.table, individual_rng(self.seed_sequence, PHASE_INIT, 0, k))
+                population.append(individual)
+                if optimum is not None and self.evaluate([individual])[0] >= optimum:
+                    break
+                if deadline is not None and time.time() >= deadline:
+                    break
+            return population
+        return self._map(_init_chunk, _chunks(list(range(pop_size)), self.workers), self.seed_sequence)
+
+    def evaluate(self, population):
+        """Scores of ``population``, reusing each individual's cached fitness.
+
+        ``evaluations`` counts the individuals that had to be scored and
+        ``cache_hits`` those whose fitness was still valid.
+        """
+        scores = []
+        for individual in population:
+            if individual.fitness is None:
+                self.evaluations += 1
+            else:
+                self.cache_hits += 1
+            scores.append(individual.score(self.table))
+        if self.penalty is not None:
+            pending = [individual for individual in population if individual.penalty is None]
+            if pending:
+                costs = self.penalty.costs(np.stack([individual.genome for individual in pending]))
+                for individual, cost in zip(pending, costs.tolist()):
+                    individual.penalty = cost
+        return scores
+
+    def mutate(self, population, selected, generation):
+        """Mutate the individuals whose positions are listed in ``selected``."""
+        items = [(k, population[k]) for k in selected]
+        if not items:
+            return population
+        if not self._pool:
+            mutated = [
+                mutate_individual(self.table, individual, individual_rng(self.seed_sequence, PHASE_MUTATION, generation, k))
+                for k, individual in items
+            ]
+        else:
+            mutated = self._map(_mutate_chunk, _chunks(items, self.workers), self.seed_sequence, generation)
+        population = list(population)
+        for (k, _), individual in zip(items, mutated):
+            population[k] = individual
+        return population
+
+
+def island_seed(seed_sequence, island):
+    return np.random.SeedSequence(seed_sequence.entropy, spawn_key=tuple(seed_sequence.spawn_key) + (island,))
+
+
+def _island_start(seed_sequence, pop_size):
+    runner = PopulationRunner(_worker_table, seed_sequence, penalty=_worker_penalty)
+    population = runner.initialize(pop_size)
+    return population, np.random.default_rng(seed_sequence)
+
+
+def _island_epoch(seed_sequence, population, rng, first_generation, generations, pop_size, mutation_rate,
+                  deadline=None, optimum=None):
+    runner = PopulationRunner(_worker_table, seed_sequence, penalty=_worker_penalty)
+    # Süre ve optimum kontrolü dönem içinde de yapılır; durgunluk ana süreçte izlenir
+    local_stop = Termination(optimum=optimum, deadline=deadline)
+    population, scores = evolve(runner, population, rng, generations, pop_size, mutation_rate, first_generation,
+                                progress=local_stop)
+    return population, rng, scores, local_stop.generation, (runner.evaluations, runner.cache_hits)
+
+
+def migrate(populations, scores, migrants):
+    """Ring migration: each island's best replace the next island's worst."""
+    count = len(populations)
+    emigrants = []
+    for k in range(count):
+        best = np.argsort(scores[k], kind="stable")[::-1][:migrants]
+        emigrants.append([(populations[k][b].copy(), scores[k][b]) for b in best])
+    for k in range(count):
+        target = (k + 1) % count
+        worst = np.argsort(scores[target], kind="stable")[:len(emigrants[k])]
+        for w, (individual, score) in zip(worst, emigrants[k]):
+            populations[target][w] = individual
+            scores[target][w] = score
+
+
+def run_islands(table, seed_sequence, islands, generations, pop_size, mutation_rate,
+                migration_interval=20, migrants=2, progress=None, deadline=None, optimum=None, stats=None,
+                seed_individuals=(), soft_weights=None):
+    """Evolve ``islands`` populations in separate processes with ring migration.
+
+    Every ``migration_interval`` generations the ``migrants`` best individuals
+    of each island replace the worst ones of its neighbour. ``progress`` is
+    called once per epoch, as in ``evolve``; islands also stop an epoch
+    early at the wall-clock ``deadline`` or when one reaches ``optimum``.
+    Evaluation counters of the islands are added to the ``stats`` dict if
+    given, and ``seed_individuals`` replace the first individuals of the
+    first island. Returns the final populations and scores of every island.
+    """
+    seeds = [island_seed(seed_sequence, k) for k in range(islands)]
+    migration_interval = max(1, migration_interval)
+    with ProcessPoolExecutor(max_workers=islands, initializer=_init_worker, initargs=(table, soft_weights)) as pool:
+        started = list(pool.map(_island_start, seeds, [pop_size] * islands))
+        populations = [list(population) for population, _ in started]
+        seed_individuals = list(seed_individuals)[:len(populations[0])]
+        populations[0][:len(seed_individuals)] = seed_individuals
+        rngs = [rng for _, rng in started]
+        scores = [[] for _ in range(islands)]
+        generation = 0
+        while generation < generations:
+            span = min(migration_interval, generations - generation)
+            results = list(pool.map(
+                _island_epoch, seeds, populations, rngs,
+                [generation] * islands, [span] * islands, [pop_size] * islands, [mutation_rate] * islands,
+                [deadline] * islands, [optimum] * islands
+            ))
+            populations = [list(population) for population, *_ in results]
+            rngs = [rng for _, rng, *_ in results]
+            scores = [list(island_scores) for _, _, island_scores, *_ in results]
+            generation = max(reached for *_, reached, _ in results)
+            if stats is not None:
+                for *_, (evaluations, cache_hits) in results:
+                    stats["evaluations"] = stats.get("evaluations", 0) + evaluations
+                    stats["cache_hits"] = stats.get("cache_hits", 0) + cache_hits
+            if progress is not None:
+                best = max(
+                    ((population[k], island_scores[k]) for population, island_scores in zip(populations, scores)
+                     for k in range(len(population))),
+                    key=lambda item: rank(*item)
+                )
+                extra = (best[0].penalty,) if soft_weights is not None and isinstance(progress, Termination) else ()
+                if progress(generation, best[1], *extra) is False:
+                    break
+            if generation < generations and migrants > 0:
+                migrate(populations, scores, migrants)
+        if not generations:
+            scores = [[individual.score(table) for individual in population] for population in populations]
+    return populations, scores
+
+
+class Termination:
+    """Progress callback that decides when a run stops and records why.
+
+    Stops once the best fitness reaches ``optimum``, when the wall-clock
+    ``deadline`` (``time.time()`` value) has passed, or after
+    ``stall_generations`` generations without improvement. An outer
+    ``progress`` callback returning ``False`` counts as a cancellation.
+    ``stop_reason`` stays ``"generations"`` when none of these fire.
+    With soft constraints the best ``penalty`` is passed as well, and a
+    lower penalty at the same fitness counts as an improvement.
+    """
+
+    def __init__(self, optimum=None, deadline=None, stall_generations=None, progress=None):
+        self.optimum = optimum
+        self.deadline = deadline
+        self.stall_generations = stall_generations
+        self.progress = progress
+        self.stop_reason = "generations"
+        self.generation = 0
+        self.best = None
+        self.best_penalty = None
+        self._improved_at = 0
+
+    def __call__(self, generation, best, penalty=None):
+        self.generation = generation
+        if (self.best is None or best > self.best
+                or (best == self.best and penalty is not None and penalty < self.best_penalty)):
+            self.best = best
+            self.best_penalty = penalty
+            self._improved_at = generation
+        if self.progress is not None and self.progress(generation, best) is False:
+            self.stop_reason = "cancelled"
+        elif self.optimum is not None and best >= self.optimum:
+            self.stop_reason = "optimal"
+        elif self.deadline is not None and time.time() >= self.deadline:
+            self.stop_reason = "time_limit"
+        elif self.stall_generations and generation - self._improved_at >= self.stall_generations:
+            self.stop_reason = "stalled"
+        else:
+            return True
+        return False
+
+
+def run_genetic(table, seed=None, generations=200, pop_size=100, mutation_rate=0.05, workers=None,
+                islands=1, migration_interval=20, migrants=2, max_seconds=None, stall_generations=None,
+                local_search_seconds=None, local_search_iterations=None, dsatur_seeds=0, soft_weights=None,
+                progress=None):
+    """Solve ``table`` and return ``(best genome, run info)``.
+
+    The run ends after ``generations``, after ``max_seconds`` of wall-clock
+    time, after ``stall_generations`` generations without a better best
+    fitness, or as soon as every placeable session is placed without a
+    violation. ``run info`` holds the ``stop_reason``, the number of
+    generations run, the elapsed seconds, the best fitness and the
+    evaluation counters of the fitness cache, and the ``seed`` used.
+
+    Every random decision draws from streams derived from ``seed`` per
+    phase, generation and individual, so a seed reproduces the schedule
+    bit for bit with any number of ``workers``. Runs cut short by
+    ``max_seconds`` stop at a hardware-dependent generation.
+
+    With ``local_search_seconds`` or ``local_search_iterations`` the best
+    individual is then refined by ``localsearch.improve`` within that
+    separate budget; its statistics are reported under ``local_search``.
+    ``dsatur_seeds`` individuals of the initial population are built by
+    the DSatur heuristic instead of random first-fit placement.
+
+    ``soft_weights`` (a possibly empty dict over ``penalty.TERMS``, missing
+    terms keep their default weight) switches on soft-constraint scoring:
+    individuals with the same fitness are ranked by their weighted penalty,
+    the run no longer stops at the first complete schedule, and the best
+    individual's ``penalty`` and ``penalty_terms`` are reported.
+
+    This is the database-free part of a solve, so it can run in a job
+    process as well as inline in a request.
+    """
+    started = time.time()
+    deadline = started + max_seconds if max_seconds else None
+    # Alanı olmayan oturumlar hiçbir zaman yerleşemez; ulaşılabilir üst sınır
+    optimum = int(table.has_domain.sum())
+    penalty = PenaltyModel(table, soft_weights) if soft_weights is not None else None
+    # Yumuşak kısıtlar açıkken tam yerleşim de iyileştirilebilir: optimumda durulmaz
+    target = optimum if penalty is None else None
+    stop = Termination(target, deadline, stall_generations, progress)
+    seed = resolve_seed(seed)
+    seed_sequence = np.random.SeedSequence(seed)
+    stats = {"evaluations": 0, "cache_hits": 0}
+    seeds = construction_seeds(table, seed_sequence, min(dsatur_seeds or 0, pop_size))
+    if islands and islands > 1:
+        # Ada modeli: her ada ayrı süreçte evrilir, en iyiler halka üzerinde göç eder
+        populations, island_scores = run_islands(
+            table, seed_sequence, islands, generations, pop_size, mutation_rate,
+            migration_interval=migration_interval, migrants=migrants, progress=stop,
+            deadline=deadline, optimum=target, stats=stats, seed_individuals=seeds, soft_weights=soft_weights
+        )
+        population = [individual for island in populations for individual in island]
+        fitness_scores = [score for scores in island_scores for score in scores]
+    else:
+        rng = np.random.default_rng(seed_sequence)
+        with PopulationRunner(table, seed_sequence, workers=workers, penalty=penalty) as runner:
+            population = seeds
+            # Yapısal tohumlardan biri zaten optimumsa rastgele başlangıca gerek yok
+            if target is None or not any(score >= target for score in runner.evaluate(seeds)):
+                population = seeds + runner.initialize(pop_size - len(seeds), deadline, target)
+            fitness_scores = runner.evaluate(population)
+            # Başlangıç popülasyonu zaten optimum ya da süre dolmuşsa evrime girme
+            if _report(stop, 0, population, fitness_scores, penalty):
+                population, fitness_scores = evolve(
+                    runner, population, rng, generations, pop_size, mutation_rate, progress=stop,
+                    fitness_scores=fitness_scores
+                )
+            stats = {"evaluations": runner.evaluations, "cache_hits": runner.cache_hits}
+    if penalty is not None:
+        PopulationRunner(table, seed_sequence, penalty=penalty).evaluate(population)
+    best = best_index(population, fitness_scores)
+    best_individual = population[best]
+    best_fitness = int(fitness_scores[best])
+    local_info = None
+    if (local_search_seconds or local_search_iterations) and stop.stop_reason != "cancelled":
+        improved, local_info = improve(
+            table, best_individual, individual_rng(seed_sequence, PHASE_LOCAL_SEARCH, 0, 0),
+            max_seconds=local_search_seconds, max_iterations=local_search_iterations
+        )
+        if penalty is not None:
+            improved.penalty = float(penalty.costs(improved.genome)[0])
+        if rank(improved, local_info["best_fitness"]) >= rank(best_individual, best_fitness):
+            best_individual, best_fitness = improved, local_info["best_fitness"]
+    info = {
+        "stop_reason": stop.stop_reason,
+        "generations_run": stop.generation,
+        "elapsed_seconds": round(time.time() - started, 3),
+        "best_fitness": best_fitness,
+        **stats,
+        "seed": seed,
+    }
+    if local_info is not None:
+        info["local_search"] = local_info
+    if penalty is not None:
+        info["penalty"] = round(best_individual.penalty, 3)
+        info["penalty_terms"] = penalty.breakdown(best_individual.genome)
+    return best_individual.genome, info
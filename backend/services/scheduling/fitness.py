@@ -0,0 +1,113 @@
+"""Vectorized fitness evaluation for the genetic scheduler.
+
+Individuals are turned into flat integer arrays (day, start/end minute,
+teacher, classroom, cohort) and hard constraints are checked with sorting
+instead of comparing every gene against every other gene.
+"""
+import numpy as np
+
+
+def parse_minutes(hhmm):
+    """Convert "HH:MM" to minutes since midnight."""
+    h, m = hhmm.split(':')
+    return int(h) * 60 + int(m)
+
+
+def overlap_flags(group, start, end):
+    """Sort order and clash flags behind ``count_overlaps``.
+
+    Returns ``(order, clashes)`` where ``clashes[k]`` tells whether entry
+    ``order[k + 1]`` overlaps an earlier entry of its group.
+    """
+    order = np.lexsort((start, group))
+    g = group[order]
+    s = start[order]
+    e = end[order]
+    span = int(e.max()) + 1
+    running_end = np.maximum.accumulate(g * span + e)
+    return order, (g[1:] * span + s[1:]) < running_end[:-1]
+
+
+def count_overlaps(group, start, end):
+    """Count entries that overlap an earlier entry of the same group.
+
+    ``group`` already combines resource and day, so two entries can only
+    clash when they share a group value. Entries are sorted by (group, start)
+    and every entry is compared with the running maximum end time of its
+    group; ``group * span + minute`` keeps those maxima from leaking across
+    group boundaries.
+    """
+    if len(group) < 2:
+        return 0
+    _, clashes = overlap_flags(group, start, end)
+    return int(np.count_nonzero(clashes))
+
+
+class FitnessEngine:
+    """Scores ``SessionTable`` genomes against teacher, room, cohort and capacity rules.
+
+    Lookup tables are built once per solve so scoring an individual is a
+    handful of array operations.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        cohort_rows = np.nonzero(table.cohort_incidence)
+        self._cohort_session = cohort_rows[0].astype(np.int64)
+        self._cohort_id = cohort_rows[1].astype(np.int64)
+
+    @classmethod
+    def for_table(cls, table):
+        """Engine that scores genomes of ``table``."""
+        return cls(table)
+
+    def encode_genome(self, genome):
+        """Turn a compact genome (see ``genome.SessionTable``) into arrays."""
+        table = self.table
+        placed = genome[:, 0] >= 0
+        idx = np.flatnonzero(placed)
+        start = genome[idx, 1].astype(np.int64) * table.slot_minutes
+        position = np.full(len(genome), -1, dtype=np.int64)
+        position[idx] = np.arange(len(idx))
+        cohort_mask = placed[self._cohort_session]
+        room = genome[idx, 2].astype(np.int64)
+        return {
+            "day": genome[idx, 0].astype(np.int64),
+            "start": start,
+            "end": start + table.duration_slots[idx] * table.slot_minutes,
+            "teacher": table.teacher_ids[idx],
+            "room": room,
+            "students": table.course_students[idx],
+            "capacity": table.room_capacity[room],
+            "cohort_gene": position[self._cohort_session[cohort_mask]],
+            "cohort_id": self._cohort_id[cohort_mask],
+        }
+
+    def count_violations(self, genome):
+        """Return hard-constraint violation counts for one genome."""
+        return self.count_encoded_violations(self.encode_genome(genome))
+
+    def count_encoded_violations(self, arrays):
+        day, start, end = arrays["day"], arrays["start"], arrays["end"]
+        teacher = arrays["teacher"]
+        has_teacher = teacher >= 0
+        cg = arrays["cohort_gene"]
+        n_days = int(day.max()) + 1 if len(day) else 1
+        return {
+            "teacher": count_overlaps(
+                teacher[has_teacher] * n_days + day[has_teacher],
+                start[has_teacher], end[has_teacher]
+            ),
+            "room": count_overlaps(arrays["room"] * n_days + day, start, end),
+            "cohort": count_overlaps(arrays["cohort_id"] * n_days + day[cg], start[cg], end[cg]),
+            "capacity": int(np.count_nonzero(arrays["capacity"] < arrays["students"])),
+        }
+
+    def score_genome(self, genome):
+        """Number of placed sessions, or 0 when any hard constraint is violated."""
+        arrays = self.encode_genome(genome)
+        if not len(arrays["day"]):
+            return 0
+        if any(self.count_encoded_violations(arrays).values()):
+            return 0
+        return len(arrays["day"])
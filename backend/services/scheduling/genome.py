@@ -0,0 +1,200 @@
+"""Compact integer genome for the genetic scheduler.
+
+Every solve builds a ``SessionTable`` once: one row per (course, session)
+with the static data the GA needs. An individual is then a fixed-length
+``int16`` array of shape ``(len(table), 3)`` holding the day index, the
+slot-start index and the classroom index of each session (``-1`` while
+the session is unplaced), so selection, crossover and mutation work on
+small arrays instead of deep copies of gene dicts.
+"""
+import copy
+import numpy as np
+from services.scheduling.rooms import ClassroomIndex
+from services.scheduling.availability import SLOT_MINUTES, DAY_ORDER, slot_starts, teacher_masks
+
+
+DAY, START, ROOM = 0, 1, 2
+UNPLACED = -1
+
+MAX_DAILY_HOURS = 8
+MIN_BREAK_MINUTES = 30
+
+
+def format_minutes(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def flexible_starts(starts, needed_slots):
+    """Slot starts that begin ``needed_slots`` consecutive available slots.
+
+    ``starts`` is a sorted list of unique slot indices.
+    """
+    if needed_slots <= 0:
+        return []
+    return [
+        starts[i] for i in range(len(starts) - needed_slots + 1)
+        if starts[i + needed_slots - 1] - starts[i] == needed_slots - 1
+    ]
+
+
+class SessionTable:
+    """Static per-session data shared by every individual of one solve.
+
+    Building the table is the one-time "problem compilation" step: besides
+    teacher, duration, student and cohort data it stores each session's
+    candidate domain, i.e. the (day, slot start) pairs its teacher can
+    cover (``domain_slots``) and the classrooms that fit its type and size
+    (``session_rooms``). Initialisation, mutation and repair sample from
+    these instead of recomputing them per individual.
+
+    The table only holds plain Python and NumPy values so it can be pickled
+    once into worker processes.
+    """
+
+    slot_minutes = SLOT_MINUTES
+
+    def __init__(self, courses, teachers, classrooms, course_sessions, room_filter):
+        # Öğretmen müsaitliği yazma anında gün maskelerine derlenmiştir; burada yalnızca bitler açılır
+        availability = {
+            t.id: {day: slot_starts(mask) for day, mask in teacher_masks(t).items() if mask}
+            for t in teachers.values()
+        }
+        day_names = {day for days in availability.values() for day in days}
+        self.days = sorted(day_names, key=lambda d: (DAY_ORDER.index(d) if d in DAY_ORDER else len(DAY_ORDER), d))
+        day_index = {day: i for i, day in enumerate(self.days)}
+
+        classrooms = list(classrooms)
+        self.room_ids = [room.id for room in classrooms]
+        self.room_index = {room_id: i for i, room_id in enumerate(self.room_ids)}
+        self.room_capacity = np.array([getattr(r, 'capacity', 0) or 0 for r in classrooms], dtype=np.int64)
+
+        # Öğretmen başına: [(gün indeksi, sıralı slot başlangıçları), ...]
+        self.teacher_availability = {
+            teacher_id: [(day_index[day], starts) for day, starts in days.items()]
+            for teacher_id, days in availability.items()
+        }
+
+        # Derslik dizini çözüm başına bir kez kurulur; aynı (tip, öğrenci) sorgusu tekrar hesaplanmaz
+        room_lookup = ClassroomIndex(classrooms)
+        room_domains = {}
+        rows = []
+        cohort_ids = {}
+        for course in courses:
+            teacher = teachers.get(course.teacher_id)
+            if not teacher:
+                continue
+            departments = sorted({d.department for d in course.departments})
+            cohorts = [cohort_ids.setdefault((dept, course.level), len(cohort_ids)) for dept in departments]
+            total_students = sum(d.student_count for d in course.departments)
+            for session in course_sessions.get(course.id, []):
+                key = (session.type, total_students)
+                if key not in room_domains:
+                    room_domains[key] = [
+                        self.room_index[r.id] for r in room_filter(session.type, room_lookup, total_students)
+                    ]
+                rooms = room_domains[key]
+                rows.append((course, session, cohorts, total_students, rooms))
+
+        n = len(rows)
+        self.course_ids = np.array([course.id for course, *_ in rows], dtype=np.int64)
+        self.teacher_ids = np.array([course.teacher_id for course, *_ in rows], dtype=np.int64)
+        teacher_keys, self.teacher_index = np.unique(self.teacher_ids, return_inverse=True)
+        self.n_teachers = len(teacher_keys)
+        self.session_types = [session.type for _, session, *_ in rows]
+        self.hours = np.array([session.hours for _, session, *_ in rows], dtype=np.float64)
+        self.duration_slots = (self.hours * 60 // SLOT_MINUTES).astype(np.int64)
+        self.total_students = np.array([row[3] for row in rows], dtype=np.int64)
+        self.course_students = np.array(
+            [getattr(course, 'student_count', 0) or 0 for course, *_ in rows], dtype=np.int64
+        )
+        self.session_rooms = [np.array(row[4], dtype=np.int64) for row in rows]
+        self.session_cohorts = [row[2] for row in rows]
+        self.n_cohorts = len(cohort_ids)
+        self.cohort_incidence = np.zeros((n, self.n_cohorts), dtype=bool)
+        for i, cohorts in enumerate(self.session_cohorts):
+            self.cohort_incidence[i, cohorts] = True
+
+        # Aynı öğretmen ve süre için (gün, başlangıç) alanı bir kez hesaplanır
+        slot_domains = {}
+        self.domain_slots = []
+        for teacher_id, duration in zip(self.teacher_ids.tolist(), self.duration_slots.tolist()):
+            key = (teacher_id, duration)
+            if key not in slot_domains:
+                slot_domains[key] = np.array([
+                    (day, start)
+                    for day, starts in self.teacher_availability.get(teacher_id, [])
+                    for start in flexible_starts(starts, duration)
+                ], dtype=np.int16).reshape(-1, 2)
+            self.domain_slots.append(slot_domains[key])
+        self.has_domain = np.array(
+            [len(slots) > 0 and len(rooms) > 0 for slots, rooms in zip(self.domain_slots, self.session_rooms)],
+            dtype=bool
+        )
+        by_course = {}
+        for i, course_id in enumerate(self.course_ids.tolist()):
+            by_course.setdefault(course_id, []).append(i)
+        # Aynı dersin diğer oturumları (günde bir oturum kuralı için)
+        self.siblings = [
+            np.array([j for j in by_course[course_id] if j != i], dtype=np.int64)
+            for i, course_id in enumerate(self.course_ids.tolist())
+        ]
+        # Artımlı çözümde sabitlenen yerleşimler (bkz. warmstart.pin_schedule)
+        self.initial = self.new_genome()
+        self.pinned = np.zeros(n, dtype=bool)
+        self.pinned_rows = {}
+
+    def __len__(self):
+        return len(self.course_ids)
+
+    def subset(self, indices):
+        """Table of the sessions ``indices`` only.
+
+        Day, classroom, teacher and cohort numbering is shared with this
+        table, so a sub-genome maps back by writing it to ``indices``.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        local = {int(i): k for k, i in enumerate(indices)}
+        sub = copy.copy(self)
+        for name in ("course_ids", "teacher_ids", "teacher_index", "hours", "duration_slots",
+                     "total_students", "course_students", "cohort_incidence", "has_domain",
+                     "initial", "pinned"):
+            setattr(sub, name, getattr(self, name)[indices])
+        for name in ("session_types", "session_rooms", "session_cohorts", "domain_slots"):
+            values = getattr(self, name)
+            setattr(sub, name, [values[i] for i in indices])
+        sub.siblings = [
+            np.array([local[j] for j in self.siblings[i].tolist() if j in local], dtype=np.int64)
+            for i in indices.tolist()
+        ]
+        sub.pinned_rows = {local[i]: row for i, row in self.pinned_rows.items() if i in local}
+        return sub
+
+    def new_genome(self):
+        return np.full((len(self), 3), UNPLACED, dtype=np.int16)
+
+    def time_range(self, i, start_slot):
+        start = int(start_slot) * SLOT_MINUTES
+        end = start + int(self.duration_slots[i]) * SLOT_MINUTES
+        return f"{format_minutes(start)}-{format_minutes(end)}"
+
+    def decode(self, genome, skip=None):
+        """Turn a genome back into ``Schedule`` column values, minute columns included.
+
+        Sessions flagged in the boolean mask ``skip`` are left out.
+        """
+        placed = genome[:, DAY] >= 0
+        if skip is not None:
+            placed &= ~skip
+        entries = []
+        for i in np.flatnonzero(placed):
+            day, start, room = genome[i]
+            start_minute = int(start) * SLOT_MINUTES
+            entries.append({
+                "day": self.days[day].capitalize(),
+                "time_range": self.time_range(i, start),
+                "start_minute": start_minute,
+                "end_minute": start_minute + int(self.duration_slots[i]) * SLOT_MINUTES,
+                "course_id": int(self.course_ids[i]),
+                "classroom_id": self.room_ids[room],
+            })
+        return entries
@@ -0,0 +1,278 @@
+"""Background schedule-generation jobs.
+
+A job runs ``solve_table`` (any method ``/generate`` accepts) in its own
+(non-daemon) process so the API stays responsive and island mode can still
+start worker processes. Job processes are spawned, not forked, because the
+API process runs threads. Progress is shared through
+``multiprocessing.Value`` objects and cancellation through an ``Event``
+that the GA checks once per generation. A monitor thread in the
+API process receives the best genome, lets the caller persist it and stores
+the outcome in the ``schedule_jobs`` table so results survive the process.
+
+Each row records its owning API process and a heartbeat. Another worker
+cancels a job by setting ``cancel_requested``, which the owner's monitor
+picks up on its next poll; rows whose owner is gone count as orphaned.
+"""
+import json
+import multiprocessing as mp
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import sessionmaker
+from models import ScheduleJob
+from services.scheduling.solve import solve_table
+
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+SAVING = "saving"
+
+
+def _run_job(table, params, generation, best_fitness, cancel, conn):
+    def progress(gen, best):
+        generation.value = int(gen)
+        best_fitness.value = int(best)
+        return not cancel.is_set()
+
+    try:
+        genome, run_info, engine = solve_table(table, progress=progress, **params)
+        conn.send((CANCELLED, None) if cancel.is_set() else (COMPLETED, (genome, run_info, engine)))
+    except Exception as e:
+        conn.send((FAILED, str(e)))
+    finally:
+        conn.close()
+
+
+def _pid_alive(pid):
+    if os.name != "posix":
+        # os.kill(pid, 0) yalnızca POSIX'te zararsız bir yoklamadır
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class _LiveJob:
+    def __init__(self, context):
+        self.generation = context.Value('i', 0, lock=False)
+        self.best_fitness = context.Value('i', 0, lock=False)
+        self.cancel = context.Event()
+        self.started = time.monotonic()
+        self.process = None
+        self.monitor = None
+
+
+class JobManager:
+    """Starts, tracks and cancels solve jobs of this API process."""
+
+    # Sahibin kaydı yoklama aralığı ve sahipsiz sayılma süresi (saniye)
+    HEARTBEAT_SECONDS = 5
+    STALE_SECONDS = 30
+
+    def __init__(self):
+        # Çok iş parçacıklı uvicorn sürecinden fork güvenli değil
+        self._context = mp.get_context("spawn")
+        self._live = {}
+        self._lock = threading.Lock()
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+
+    def submit(self, db, table, params, finish):
+        """Start a job and return its id.
+
+        ``finish(genome, run_info, engine, session)`` runs in the monitor thread
+        with a fresh session on the same database and returns the JSON-able
+        result.
+        """
+        job_id = uuid.uuid4().hex
+        now = datetime.utcnow()
+        db.add(ScheduleJob(
+            id=job_id, status=RUNNING, params=json.dumps(params),
+            generation=0, best_fitness=0, created_at=now,
+            owner=self.owner, heartbeat_at=now, cancel_requested=False
+        ))
+        db.commit()
+        live = _LiveJob(self._context)
+        parent_conn, child_conn = self._context.Pipe(duplex=False)
+        live.process = self._context.Process(
+            target=_run_job,
+            args=(table, params, live.generation, live.best_fitness, live.cancel, child_conn),
+            name=f"schedule-job-{job_id[:8]}"
+        )
+        session_factory = sessionmaker(bind=db.get_bind())
+        live.monitor = threading.Thread(
+            target=self._monitor, args=(job_id, live, parent_conn, session_factory, finish), daemon=True
+        )
+        with self._lock:
+            self._live[job_id] = live
+        live.process.start()
+        child_conn.close()
+        live.monitor.start()
+        return job_id
+
+    def _heartbeat(self, job_id, live, session_factory):
+        db = session_factory()
+        try:
+            job = db.query(ScheduleJob).filter(ScheduleJob.id == job_id).first()
+            if job is None or job.status != RUNNING:
+                # Kayıt başka bir süreçte kapatıldı: çözümü boşuna sürdürme
+                live.cancel.set()
+                return
+            if job.cancel_requested:
+                live.cancel.set()
+            job.heartbeat_at = datetime.utcnow()
+            db.commit()
+        except SQLAlchemyError:
+            # Kilitli veritabanı bir yoklamayı atlatır; sonraki yoklama yeniden dener
+            db.rollback()
+        finally:
+            db.close()
+
+    def _receive(self, job_id, live, conn, session_factory):
+        try:
+            while not conn.poll(self.HEARTBEAT_SECONDS):
+                self._heartbeat(job_id, live, session_factory)
+            return conn.recv()
+        except EOFError:
+            return FAILED, "İş süreci beklenmedik şekilde sonlandı"
+        finally:
+            conn.close()
+
+    def _claim(self, db, job_id, status):
+        # Yalnızca hâlâ çalışan ve iptal istenmemiş kaydın sahibi sonucu yazar
+        claimed = db.query(ScheduleJob).filter(
+            ScheduleJob.id == job_id, ScheduleJob.status == RUNNING,
+            ScheduleJob.cancel_requested.isnot(True)
+        ).update({ScheduleJob.status: status, ScheduleJob.heartbeat_at: datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+        return claimed == 1
+
+    def _monitor(self, job_id, live, conn, session_factory, finish):
+        status, payload = self._receive(job_id, live, conn, session_factory)
+        live.process.join()
+        db = session_factory()
+        try:
+            result = None
+            if status == COMPLETED and not self._claim(db, job_id, SAVING):
+                # Süreç bittiğinde iş iptal edilmiş ya da başka yerde kapatılmış
+                status, payload = CANCELLED, None
+            if status == COMPLETED:
+                try:
+                    result = finish(*payload, db)
+                except Exception as e:
+                    db.rollback()
+                    status, payload = FAILED, str(e)
+            job = db.query(ScheduleJob).filter(ScheduleJob.id == job_id).first()
+            if job and job.status in (RUNNING, SAVING):
+                job.status = status
+                job.generation = live.generation.value
+                job.best_fitness = live.best_fitness.value
+                job.elapsed_seconds = round(time.monotonic() - live.started, 3)
+                job.finished_at = datetime.utcnow()
+                job.result = json.dumps(result) if result is not None else None
+                job.error = payload if status == FAILED else None
+                db.commit()
+        finally:
+            db.close()
+            with self._lock:
+                self._live.pop(job_id, None)
+
+    def status(self, db, job_id):
+        """Job state as a dict, or ``None`` for an unknown id."""
+        job = db.query(ScheduleJob).filter(ScheduleJob.id == job_id).first()
+        if not job:
+            return None
+        with self._lock:
+            live = self._live.get(job_id)
+        info = {
+            "job_id": job.id,
+            "status": job.status,
+            "generation": job.generation,
+            "best_fitness": job.best_fitness,
+            "elapsed_seconds": job.elapsed_seconds,
+            "params": json.loads(job.params) if job.params else {},
+            "created_at": job.created_at,
+            "finished_at": job.finished_at,
+        }
+        if live is not None:
+            info["generation"] = live.generation.value
+            info["best_fitness"] = live.best_fitness.value
+            info["elapsed_seconds"] = round(time.monotonic() - live.started, 3)
+            if live.cancel.is_set() and job.status == RUNNING:
+                info["status"] = "cancelling"
+        elif job.status == RUNNING and job.created_at:
+            # Başka bir süreçte (ör. başka bir uvicorn işçisi) çalışan iş
+            info["elapsed_seconds"] = round((datetime.utcnow() - job.created_at).total_seconds(), 3)
+            if job.cancel_requested:
+                info["status"] = "cancelling"
+        if job.result:
+            info["result"] = json.loads(job.result)
+        if job.error:
+            info["error"] = job.error
+        return info
+
+    def cancel(self, db, job_id):
+        """Request cooperative cancellation; returns the job status or ``None``."""
+        job = db.query(ScheduleJob).filter(ScheduleJob.id == job_id).first()
+        if not job:
+            return None
+        if job.status != RUNNING:
+            return job.status
+        with self._lock:
+            live = self._live.get(job_id)
+        if live is None and self._orphaned(job):
+            # Sahibi artık yok (ör. sunucu yeniden başlatıldı): kaydı kapat
+            job.status = CANCELLED
+            job.finished_at = datetime.utcnow()
+            db.commit()
+            return CANCELLED
+        # Sahibi (bu ya da başka bir işçi) bayrağı görüp çözümü durdurur
+        job.cancel_requested = True
+        db.commit()
+        if live is not None:
+            live.cancel.set()
+        return "cancelling"
+
+    def _orphaned(self, job):
+        if not job.owner or job.heartbeat_at is None:
+            return True
+        if datetime.utcnow() - job.heartbeat_at > timedelta(seconds=self.STALE_SECONDS):
+            return True
+        host, _, pid = job.owner.rpartition(":")
+        return host == socket.gethostname() and pid.isdigit() and not _pid_alive(int(pid))
+
+    def recover(self, db):
+        """Fail running jobs whose owning process is gone; returns their count."""
+        with self._lock:
+            live = set(self._live)
+        orphans = [
+            job for job in db.query(ScheduleJob).filter(ScheduleJob.status.in_((RUNNING, SAVING))).all()
+            if job.id not in live and self._orphaned(job)
+        ]
+        now = datetime.utcnow()
+        for job in orphans:
+            job.status = FAILED
+            job.finished_at = now
+            job.error = "İşi çalıştıran süreç sonlandı"
+        db.commit()
+        return len(orphans)
+
+    def wait(self, job_id, timeout=None):
+        """Block until the job's monitor thread has stored the outcome."""
+        with self._lock:
+            live = self._live.get(job_id)
+        if live is not None:
+            live.monitor.join(timeout)
+            return not live.monitor.is_alive()
+        return True
+
+
+job_manager = JobManager()
@@ -0,0 +1,165 @@
+"""Simulated-annealing / tabu post-optimisation of a GA result.
+
+The search keeps the schedule free of hard-constraint violations and
+maximises the number of placed sessions. Two moves are used:
+
+* relocate: a placed session jumps to another feasible (day, start, room)
+  of its domain (neutral, keeps the search moving);
+* insert: an unplaced session takes a random value of its domain and
+  ejects the sessions blocking it (gain ``1 - ejected``).
+
+Worsening inserts are accepted with the annealing probability
+``exp(gain / T)``. Recently moved sessions are tabu and cannot be ejected,
+which keeps the search from undoing its own last steps. Every move is
+applied to the individual's occupancy state, so it costs O(session length)
+plus one vectorised blocker lookup.
+"""
+import math
+import time
+import numpy as np
+from services.scheduling.genome import DAY, START, ROOM, UNPLACED
+from services.scheduling.delta import Individual, OccupancyState, BREAK_SLOTS
+
+
+def conflict_free(table, individual):
+    """Copy of ``individual`` without the sessions that break a placement rule.
+
+    Pinned sessions come first, then the rest in table order while they
+    still fit, so an already valid individual is returned unchanged.
+    """
+    genome = table.new_genome()
+    state = OccupancyState(table)
+    placed = individual.genome[:, DAY] >= 0
+    for i in np.concatenate([np.flatnonzero(placed & table.pinned), np.flatnonzero(placed & ~table.pinned)]):
+        value = individual.genome[i]
+        if state.can_place(table, i, *value):
+            state.place(table, i, *value)
+            genome[i] = value
+    return Individual(genome, state)
+
+
+class LocalSearch:
+    """Annealing with a tabu list over one conflict-free individual."""
+
+    def __init__(self, table, rng, tabu_tenure=10, initial_temperature=1.0, cooling=0.995):
+        self.table = table
+        self.rng = rng
+        self.tabu_tenure = tabu_tenure
+        self.initial_temperature = initial_temperature
+        self.cooling = cooling
+        self._cohort_neighbours = {}
+        self.movable = table.has_domain & ~table.pinned
+
+    def _shares_cohort(self, i):
+        shares = self._cohort_neighbours.get(i)
+        if shares is None:
+            table = self.table
+            shares = table.cohort_incidence[:, table.cohort_incidence[i]].any(axis=1)
+            self._cohort_neighbours[i] = shares
+        return shares
+
+    def blockers(self, genome, i, day, start, room):
+        """Placed sessions that keep session ``i`` from (day, start, room)."""
+        table = self.table
+        end = start + int(table.duration_slots[i])
+        starts = genome[:, START].astype(np.int64)
+        ends = starts + table.duration_slots
+        same_day = genome[:, DAY] == day
+        overlap = same_day & (starts < end) & (ends > start)
+        blocking = overlap & ((table.teacher_index == table.teacher_index[i]) | (genome[:, ROOM] == room))
+        blocking |= (same_day & self._shares_cohort(i)
+                     & (starts < end + BREAK_SLOTS) & (ends > start - BREAK_SLOTS))
+        blocking[i] = False
+        return np.flatnonzero(blocking)
+
+    def _random_value(self, i):
+        table = self.table
+        slots = table.domain_slots[i]
+        rooms = table.session_rooms[i]
+        day, start = slots[self.rng.integers(len(slots))]
+        return int(day), int(start), int(rooms[self.rng.integers(len(rooms))])
+
+    def run(self, individual, max_seconds=None, max_iterations=None):
+        """Improve ``individual``; returns the best individual and run info."""
+        table = self.table
+        started = time.time()
+        current = conflict_free(table, individual)
+        best = current.copy()
+        start_fitness = current.score(table)
+        tabu_until = np.zeros(len(table), dtype=np.int64)
+        temperature = self.initial_temperature
+        iteration = accepted = 0
+        while True:
+            if max_iterations is not None and iteration >= max_iterations:
+                break
+            if max_seconds is not None and time.time() - started >= max_seconds:
+                break
+            if max_iterations is None and max_seconds is None:
+                break
+            iteration += 1
+            temperature *= self.cooling
+            genome = current.genome
+            unplaced = np.flatnonzero((genome[:, DAY] < 0) & self.movable)
+            placed = np.flatnonzero((genome[:, DAY] >= 0) & self.movable)
+            if len(unplaced) and (not len(placed) or self.rng.random() < 0.5):
+                if self._insert(current, unplaced, tabu_until, iteration, temperature):
+                    accepted += 1
+            elif len(placed):
+                if self._relocate(current, placed, tabu_until, iteration):
+                    accepted += 1
+            else:
+                break
+            if current.score(table) > best.score(table):
+                best = current.copy()
+        info = {
+            "iterations": iteration,
+            "accepted": accepted,
+            "start_fitness": int(start_fitness),
+            "best_fitness": int(best.score(table)),
+            "elapsed_seconds": round(time.time() - started, 3),
+        }
+        return best, info
+
+    def _relocate(self, current, placed, tabu_until, iteration):
+        table = self.table
+        i = int(self.rng.choice(placed))
+        value = self._random_value(i)
+        old = tuple(int(x) for x in current.genome[i])
+        if value == old:
+            return False
+        state = current.ensure_state(table)
+        state.remove(table, i, *old)
+        fits = state.can_place(table, i, *value)
+        state.place(table, i, *old)
+        if not fits:
+            return False
+        current.move(table, i, *value)
+        tabu_until[i] = iteration + self.tabu_tenure
+        return True
+
+    def _insert(self, current, unplaced, tabu_until, iteration, temperature):
+        table = self.table
+        i = int(self.rng.choice(unplaced))
+        value = self._random_value(i)
+        ejected = self.blockers(current.genome, i, *value)
+        if len(ejected) and ((tabu_until[ejected] > iteration).any() or table.pinned[ejected].any()):
+            return False
+        gain = 1 - len(ejected)
+        if gain < 0 and self.rng.random() >= math.exp(gain / max(temperature, 1e-9)):
+            return False
+        previous = [(j, tuple(int(x) for x in current.genome[j])) for j in ejected]
+        for j in ejected:
+            current.move(table, j, UNPLACED, UNPLACED, UNPLACED)
+        if not current.ensure_state(table).can_place(table, i, *value):
+            # Günlük saat sınırı gibi ikili olmayan bir kısıt: geri al
+            for j, old in previous:
+                current.move(table, j, *old)
+            return False
+        current.move(table, i, *value)
+        tabu_until[i] = iteration + self.tabu_tenure
+        return True
+
+
+def improve(table, individual, rng, max_seconds=None, max_iterations=None, **options):
+    """Run ``LocalSearch`` from ``individual``; returns ``(individual, info)``."""
+    return LocalSearch(table, rng, **options).run(individual, max_seconds, max_iterations)
@@ -0,0 +1,141 @@
+"""Weighted penalty vector for whole GA populations.
+
+The GA's fitness only says how many sessions are placed, and 0 as soon as
+a hard constraint is broken, so most individuals tie. ``PenaltyModel``
+scores a stack of genomes at once on graded terms:
+
+* ``hard``: double bookings of teachers, classrooms and cohorts plus
+  capacity violations;
+* ``unplaced``: placeable sessions without a placement;
+* ``teacher_gaps`` / ``cohort_gaps``: idle hours between the first and the
+  last session of a teacher or cohort on one day;
+* ``oversize``: unused share of the seats of each classroom used;
+* ``same_day``: extra sessions of one course on the same day;
+* ``late``: hours taught after ``late_start``.
+
+Every term is computed for all individuals together by grouping on
+``(individual, resource, day)`` keys, so a population costs a few sorts and
+``bincount`` calls. The weighted sum is the individual's cost; lower is
+better.
+"""
+import numpy as np
+from services.scheduling.genome import DAY, START, ROOM
+from services.scheduling.fitness import overlap_flags
+
+TERMS = ("hard", "unplaced", "teacher_gaps", "cohort_gaps", "oversize", "same_day", "late")
+
+DEFAULT_WEIGHTS = {
+    "hard": 100.0,
+    "unplaced": 10.0,
+    "teacher_gaps": 1.0,
+    "cohort_gaps": 1.0,
+    "oversize": 0.5,
+    "same_day": 5.0,
+    "late": 0.5,
+}
+
+LATE_START_MINUTES = 17 * 60
+
+
+def _idle_minutes(group, start, end, n_groups):
+    """Per-group span minus booked minutes (idle time between sessions)."""
+    if not len(group):
+        return np.zeros(n_groups)
+    first = np.full(n_groups, np.iinfo(np.int64).max)
+    last = np.zeros(n_groups, dtype=np.int64)
+    np.minimum.at(first, group, start)
+    np.maximum.at(last, group, end)
+    booked = np.bincount(group, weights=end - start, minlength=n_groups)
+    used = np.bincount(group, minlength=n_groups) > 0
+    # Çakışan oturumlarda süre toplamı açıklığı aşabilir; o kısım ``hard`` terimindedir
+    return np.where(used, np.maximum(last - first - booked, 0), 0)
+
+
+class PenaltyModel:
+    """Batch penalty terms and weighted costs for one ``SessionTable``."""
+
+    def __init__(self, table, weights=None, late_start=LATE_START_MINUTES):
+        unknown = set(weights or {}) - set(TERMS)
+        if unknown:
+            raise ValueError(f"Unknown penalty terms: {', '.join(sorted(unknown))}")
+        self.table = table
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.weight_vector = np.array([self.weights[term] for term in TERMS], dtype=np.float64)
+        self.late_start = late_start
+        self.n_days = max(1, len(table.days))
+        cohort_rows = np.nonzero(table.cohort_incidence)
+        self._cohort_session = cohort_rows[0].astype(np.int64)
+        self._cohort_id = cohort_rows[1].astype(np.int64)
+        _, self._course_index = np.unique(table.course_ids, return_inverse=True)
+        self.n_courses = int(self._course_index.max()) + 1 if len(table) else 0
+
+    def terms(self, genomes):
+        """``(len(genomes), len(TERMS))`` matrix of raw penalty terms."""
+        table = self.table
+        genomes = np.asarray(genomes)
+        if genomes.ndim == 2:
+            genomes = genomes[None]
+        n_pop, n = genomes.shape[0], genomes.shape[1]
+        result = np.zeros((n_pop, len(TERMS)))
+        placed = genomes[:, :, DAY] >= 0
+        ind, sess = np.nonzero(placed)
+        result[:, 1] = np.count_nonzero(~placed & table.has_domain, axis=1)
+        if not len(ind):
+            return result
+        D = self.n_days
+        day = genomes[ind, sess, DAY].astype(np.int64)
+        start = genomes[ind, sess, START].astype(np.int64) * table.slot_minutes
+        end = start + table.duration_slots[sess] * table.slot_minutes
+        room = genomes[ind, sess, ROOM].astype(np.int64)
+
+        teacher_group = (ind * table.n_teachers + table.teacher_index[sess]) * D + day
+        room_group = (ind * len(table.room_ids) + room) * D + day
+        # Kohort girdileri: yerleşmiş (birey, oturum) çiftinin her kohortu için bir satır
+        position = np.full((n_pop, n), -1, dtype=np.int64)
+        position[ind, sess] = np.arange(len(ind))
+        rows = position[:, self._cohort_session]
+        c_ind, c_k = np.nonzero(rows >= 0)
+        c_row = rows[c_ind, c_k]
+        cohort_group = (c_ind * max(1, table.n_cohorts) + self._cohort_id[c_k]) * D + day[c_row]
+
+        capacity = table.room_capacity[room]
+        students = table.course_students[sess]
+        hard = np.zeros(n_pop)
+        for group, s, e, owner in ((teacher_group, start, end, ind), (room_group, start, end, ind),
+                                   (cohort_group, start[c_row], end[c_row], c_ind)):
+            hard += self._per_individual_overlaps(group, s, e, owner, n_pop)
+        hard += np.bincount(ind, weights=capacity < students, minlength=n_pop)
+        result[:, 0] = hard
+
+        result[:, 2] = self._idle_per_individual(teacher_group, start, end, D * table.n_teachers, n_pop)
+        result[:, 3] = self._idle_per_individual(
+            cohort_group, start[c_row], end[c_row], D * max(1, table.n_cohorts), n_pop
+        )
+        spare = np.where(capacity > 0, np.maximum(capacity - students, 0) / np.maximum(capacity, 1), 0.0)
+        result[:, 4] = np.bincount(ind, weights=spare, minlength=n_pop)
+        course_day = (ind * self.n_courses + self._course_index[sess]) * D + day
+        per_course_day = np.bincount(course_day, minlength=n_pop * self.n_courses * D)
+        result[:, 5] = np.maximum(per_course_day - 1, 0).reshape(n_pop, -1).sum(axis=1)
+        late = np.maximum(end - np.maximum(start, self.late_start), 0) / 60
+        result[:, 6] = np.bincount(ind, weights=late, minlength=n_pop)
+        return result
+
+    @staticmethod
+    def _per_individual_overlaps(group, start, end, owner, n_pop):
+        if len(group) < 2:
+            return np.zeros(n_pop)
+        order, clashes = overlap_flags(group, start, end)
+        return np.bincount(owner[order][1:][clashes], minlength=n_pop).astype(np.float64)
+
+    @staticmethod
+    def _idle_per_individual(group, start, end, groups_per_individual, n_pop):
+        idle = _idle_minutes(group, start, end, n_pop * groups_per_individual)
+        return idle.reshape(n_pop, groups_per_individual).sum(axis=1) / 60
+
+    def costs(self, genomes):
+        """Weighted cost of every genome (lower is better)."""
+        return self.terms(genomes) @ self.weight_vector
+
+    def breakdown(self, genome):
+        """Raw terms of one genome as a ``{term: value}`` dict."""
+        return {term: round(float(value), 3) for term, value in zip(TERMS, self.terms(genome)[0])}
@@ -0,0 +1,49 @@
+"""Bulk write-out of a generated timetable.
+
+The stored ``Schedule`` rows are swapped for the solver's rows in one
+transaction: the stale rows are deleted and the new ones inserted in a
+single ``bulk_insert_mappings`` batch before the commit, so other
+connections see either the old or the new timetable, never a half-written
+or empty one. The inserted rows are returned with their ids, so callers
+can build their response from memory instead of reading the rows back.
+"""
+from sqlalchemy import func
+from models import Schedule
+
+
+def _assign_ids(db, rows):
+    """Number ``rows`` after the current maximum id (SQLite only).
+
+    The preceding DELETE holds SQLite's write lock until the commit, so no
+    other writer can take these ids, and a rowid table has no sequence to
+    keep in step. One ``executemany`` then inserts every row.
+    """
+    next_id = (db.query(func.max(Schedule.id)).scalar() or 0) + 1
+    for offset, row in enumerate(rows):
+        row["id"] = next_id + offset
+
+
+def replace_schedules(db, entries, keep_ids=()):
+    """Replace every ``Schedule`` row except ``keep_ids`` with ``entries``.
+
+    ``entries`` are ``Schedule`` column dicts; copies with an ``id`` added
+    are returned. Rolls back and re-raises if anything fails.
+    """
+    rows = [dict(entry) for entry in entries]
+    try:
+        stale = db.query(Schedule)
+        if keep_ids:
+            stale = stale.filter(~Schedule.id.in_(list(keep_ids)))
+        stale.delete(synchronize_session=False)
+        if rows:
+            if db.get_bind().dialect.name == "sqlite":
+                _assign_ids(db, rows)
+                db.bulk_insert_mappings(Schedule, rows)
+            else:
+                # Kimlikleri sunucu dizisi üretir; return_defaults bunları satırlara yazar
+                db.bulk_insert_mappings(Schedule, rows, return_defaults=True)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return rows
@@ -0,0 +1,51 @@
+"""Classroom lookup by normalised type and minimum capacity.
+
+Classroom and session types are free text in Turkish or English ("Lab",
+"laboratuvar", "teorik", "lecture", ...). ``ClassroomIndex`` maps every
+type once to a canonical id and keeps each type's classrooms sorted by
+capacity, so "rooms of type T seating at least N" is one ``bisect`` and a
+slice, smallest fitting room first.
+"""
+from bisect import bisect_left
+
+# Türkçe ve İngilizce tip eşlemesi: kanonik kimlik -> eşanlamlılar
+TYPE_ALIASES = {
+    "lab": ("lab", "laboratuvar", "uygulama", "uygulamalı", "uygulamali", "uygulamalı ders",
+            "uygulamali ders", "laboratory"),
+    "teorik": ("teorik", "theoretical", "lecture", "teori", "ders"),
+}
+
+_CANONICAL = {alias: canonical for canonical, aliases in TYPE_ALIASES.items() for alias in aliases}
+
+
+def normalize_type(room_type):
+    """Canonical id of a classroom or session type; unknown types map to themselves."""
+    key = " ".join((room_type or "").split()).lower()
+    return _CANONICAL.get(key, key)
+
+
+class ClassroomIndex:
+    """Classrooms bucketed by canonical type, each bucket sorted by capacity."""
+
+    def __init__(self, classrooms):
+        self.classrooms = list(classrooms)
+        buckets = {}
+        for room in self.classrooms:
+            buckets.setdefault(normalize_type(room.type), []).append(room)
+        self._buckets = {room_type: self._sorted(rooms) for room_type, rooms in buckets.items()}
+        self._all = self._sorted(self.classrooms)
+
+    @staticmethod
+    def _sorted(rooms):
+        rooms = sorted(rooms, key=lambda room: (room.capacity or 0, room.id))
+        return [room.capacity or 0 for room in rooms], rooms
+
+    def suitable(self, room_type=None, min_capacity=0):
+        """Rooms of ``room_type`` (any type if ``None``) with at least ``min_capacity`` seats.
+
+        Returns a new list, ascending by capacity.
+        """
+        capacities, rooms = self._all if room_type is None else self._buckets.get(
+            normalize_type(room_type), ((), ())
+        )
+        return list(rooms[bisect_left(capacities, min_capacity):])
@@ -0,0 +1,105 @@
+"""Immutable in-memory snapshot of a scheduling problem.
+
+``load_snapshot`` reads the active courses with their sessions,
+departments and teacher (with its compiled availability masks), plus the
+classrooms, in a fixed number of queries (``selectinload`` batches every
+relationship into one ``IN`` query). The solvers, the session table and the result summary then read
+these frozen tuples instead of issuing a query or lazy load per course.
+"""
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional, Tuple
+from sqlalchemy.orm import selectinload
+from models import Course, Classroom, Teacher
+
+
+class SessionInfo(NamedTuple):
+    id: int
+    course_id: int
+    type: str
+    hours: float
+
+
+class DepartmentInfo(NamedTuple):
+    department: str
+    student_count: int
+
+
+class TeacherInfo(NamedTuple):
+    id: int
+    name: str
+    working_days: Optional[str]
+    working_hours: Optional[str]
+    availability_masks: Mapping[str, int]
+
+
+class CourseInfo(NamedTuple):
+    id: int
+    name: str
+    code: str
+    teacher_id: Optional[int]
+    level: Optional[str]
+    total_hours: Optional[int]
+    student_count: int
+    sessions: Tuple[SessionInfo, ...]
+    departments: Tuple[DepartmentInfo, ...]
+
+
+class ClassroomInfo(NamedTuple):
+    id: int
+    name: str
+    capacity: int
+    type: str
+
+
+class ProblemSnapshot(NamedTuple):
+    courses: Tuple[CourseInfo, ...]
+    teachers: MappingProxyType
+    classrooms: Tuple[ClassroomInfo, ...]
+
+    def course_map(self):
+        return {course.id: course for course in self.courses}
+
+    def classroom_map(self):
+        return {room.id: room for room in self.classrooms}
+
+
+def _course_info(course):
+    # Oturum sırası get_course_sessions ile aynı: tipe göre
+    sessions = sorted(course.sessions, key=lambda s: (s.type or "", s.id))
+    return CourseInfo(
+        id=course.id,
+        name=course.name,
+        code=course.code,
+        teacher_id=course.teacher_id,
+        level=course.level,
+        total_hours=course.total_hours,
+        student_count=course.student_count or 0,
+        sessions=tuple(SessionInfo(s.id, s.course_id, s.type, s.hours) for s in sessions),
+        departments=tuple(DepartmentInfo(d.department, d.student_count or 0) for d in course.departments),
+    )
+
+
+def load_snapshot(db):
+    """Snapshot of the active courses, their teachers and all classrooms."""
+    courses = db.query(Course).filter(Course.is_active == True).options(
+        selectinload(Course.sessions),
+        selectinload(Course.departments),
+        selectinload(Course.teacher).selectinload(Teacher.availability),
+    ).all()
+    teachers = {}
+    for course in courses:
+        teacher = course.teacher
+        if teacher is not None and teacher.id not in teachers:
+            teachers[teacher.id] = TeacherInfo(
+                teacher.id, teacher.name, teacher.working_days, teacher.working_hours,
+                MappingProxyType(teacher.availability_masks),
+            )
+    classrooms = tuple(
+        ClassroomInfo(room.id, room.name, room.capacity or 0, room.type)
+        for room in db.query(Classroom).all()
+    )
+    return ProblemSnapshot(
+        courses=tuple(_course_info(course) for course in courses),
+        teachers=MappingProxyType(teachers),
+        classrooms=classrooms,
+    )
@@ -0,0 +1,48 @@
+"""One entry point for the database-free part of every solve method.
+
+``/generate`` calls ``solve_table`` inline and ``/jobs`` calls it in a job
+process, so both accept the same methods and parameters.
+"""
+import time
+import numpy as np
+from services.scheduling.csp import solve_csp
+from services.scheduling.decompose import run_decomposed
+from services.scheduling.dsatur import build_dsatur
+from services.scheduling.evolution import run_genetic
+
+# Kısıt çözücü için varsayılan süre sınırı (saniye)
+CSP_MAX_SECONDS = 60
+
+
+def _solve_dsatur(table, seed):
+    started = time.time()
+    # Tohum verilirse eşitlikler tohumlu rastgele kırılır, yoksa deterministik
+    individual = build_dsatur(table, np.random.default_rng(seed) if seed is not None else None)
+    best_fitness = int(individual.score(table))
+    run_info = {
+        "stop_reason": "optimal" if best_fitness == int(table.has_domain.sum()) else "constructed",
+        "best_fitness": best_fitness,
+        "elapsed_seconds": round(time.time() - started, 3),
+        "seed": seed,
+    }
+    return individual.genome, run_info
+
+
+def solve_table(table, method="genetic", decompose=False, progress=None, seed=None, max_seconds=None, **params):
+    """Solve ``table``; returns ``(genome, run_info, engine)``.
+
+    ``method`` is ``"csp"``, ``"dsatur"`` or anything else for the GA
+    (``run_decomposed`` when ``decompose``). The remaining ``params`` are
+    the GA settings; CSP only uses ``max_seconds`` and DSatur only
+    ``seed``. ``progress`` is the GA's per-generation callback.
+    """
+    if method == "csp":
+        genome, run_info = solve_csp(table, max_seconds=max_seconds or CSP_MAX_SECONDS)
+        return genome, run_info, "csp"
+    if method == "dsatur":
+        genome, run_info = _solve_dsatur(table, seed)
+        return genome, run_info, "dsatur"
+    # Ortak kaynağı olmayan parçalar ayrı süreçlerde çözülür
+    solve = run_decomposed if decompose else run_genetic
+    genome, run_info = solve(table, seed=seed, max_seconds=max_seconds, progress=progress, **params)
+    return genome, run_info, "genetik"
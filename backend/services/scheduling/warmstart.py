@@ -0,0 +1,61 @@
+"""Warm start of the genetic scheduler from stored ``Schedule`` rows.
+
+Stored entries that still fit the compiled problem are pinned into the
+``SessionTable``: every individual starts from them and mutation never
+moves them, so only new, changed or unplaced sessions are searched again.
+"""
+from services.scheduling.fitness import parse_minutes
+from services.scheduling.genome import DAY, SLOT_MINUTES
+from services.scheduling.delta import OccupancyState
+
+
+def _parse_row(row, day_index):
+    try:
+        start, end = (parse_minutes(part) for part in row.time_range.split('-'))
+    except (ValueError, AttributeError):
+        return None
+    day = day_index.get((row.day or '').lower())
+    if day is None or start % SLOT_MINUTES or end <= start:
+        return None
+    return day, start // SLOT_MINUTES, -(-(end - start) // SLOT_MINUTES)
+
+
+def pin_schedule(table, rows):
+    """Pin the still-valid ``rows`` into ``table`` and return how many.
+
+    A row is kept for an unmatched session of its course when the duration
+    matches, the slot is still in the session's domain, the classroom is
+    still suitable, the course has no other pinned session that day and the
+    placement does not clash with rows pinned before it.
+    """
+    day_index = {day: k for k, day in enumerate(table.days)}
+    free = {}
+    for i, course_id in enumerate(table.course_ids.tolist()):
+        free.setdefault(course_id, []).append(i)
+    genome = table.new_genome()
+    state = OccupancyState(table)
+    pinned_rows = {}
+    for row in sorted(rows, key=lambda r: r.id):
+        candidates = free.get(row.course_id)
+        room = table.room_index.get(row.classroom_id)
+        parsed = _parse_row(row, day_index)
+        if not candidates or room is None or parsed is None:
+            continue
+        day, start, duration = parsed
+        for i in candidates:
+            slots = table.domain_slots[i]
+            if (table.duration_slots[i] != duration
+                    or not ((slots[:, 0] == day) & (slots[:, 1] == start)).any()
+                    or room not in table.session_rooms[i]
+                    or day in genome[table.siblings[i], DAY]
+                    or not state.can_place(table, i, day, start, room)):
+                continue
+            genome[i] = (day, start, room)
+            state.place(table, i, day, start, room)
+            pinned_rows[i] = row.id
+            candidates.remove(i)
+            break
+    table.initial = genome
+    table.pinned = genome[:, DAY] >= 0
+    table.pinned_rows = pinned_rows
+    return len(pinned_rows)
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
-from models import Teacher
+from models import Teacher, parse_time_range, range_mask
+from services.scheduling.availability import DAY_ORDER, mask_ranges
 from fastapi import HTTPException, status
 from schemas.teacher import TeacherCreate
 
@@ -43,4 +44,25 @@ def delete_teacher(teacher_id: int, db: Session):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot delete teacher that has assigned courses")
     db.delete(teacher)
     db.commit()
-    return True 
\ No newline at end of file
+    return True
+
+def set_unavailable_times(teacher_id: int, unavailable_times: dict, db: Session):
+    """Block ``{day: ["HH:MM-HH:MM", ...]}`` for a teacher, replacing earlier blocks."""
+    teacher = db.query(Teacher).filter(Teacher.id == teacher_id).first()
+    if not teacher:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Teacher not found")
+    masks = {}
+    for day, ranges in unavailable_times.items():
+        day_key = day.strip().lower()
+        if day_key not in DAY_ORDER:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid day: {day}")
+        for time_range in ranges:
+            parsed = parse_time_range(time_range)
+            if parsed is None:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid time range: {time_range}")
+            # Aralığa değen her dilim kapatılır
+            masks[day_key] = masks.get(day_key, 0) | range_mask(*parsed, cover=True)
+    teacher.set_unavailable_masks(masks)
+    db.commit()
+    db.refresh(teacher)
+    return {day: mask_ranges(mask) for day, mask in teacher.availability_masks.items()}
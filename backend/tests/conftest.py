@@ -1,5 +1,8 @@
+import atexit
 import os
+import shutil
 import sys
+import tempfile
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -9,6 +12,11 @@ from sqlalchemy.pool import StaticPool
 # Add parent directory to Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# The app engine (and init_db at import) must not touch the tracked data/swesys.db
+_app_db_dir = tempfile.mkdtemp(prefix="swesys-tests-")
+atexit.register(shutil.rmtree, _app_db_dir, ignore_errors=True)
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_app_db_dir, 'app.db')}"
+
 from database import Base, get_db
 from main import app
 from models import Teacher, Classroom, Course, Schedule, CourseDepartment
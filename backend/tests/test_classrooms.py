@@ -94,4 +94,20 @@ def test_create_classroom_with_model(client):
     assert data["capacity"] == classroom.capacity
     assert data["type"] == classroom.type
     assert data["faculty"] == classroom.faculty
-    assert data["department"] == classroom.department 
\ No newline at end of file
+    assert data["department"] == classroom.department
+
+
+def test_get_free_classrooms(client, db, test_schedule):
+    """Test free-room lookup by day, time range, type alias and capacity."""
+    lab = Classroom(name="Lab A", capacity=50, type="Laboratuvar", faculty="Test Faculty", department="Test Department")
+    db.add(lab)
+    db.commit()
+    response = client.get("/api/classrooms/free", params={"day": "monday", "time_range": "10:00-11:00"})
+    assert response.status_code == status.HTTP_200_OK
+    assert [room["name"] for room in response.json()] == ["Lab A"]
+    response = client.get("/api/classrooms/free", params={"day": "Monday", "time_range": "10:30-12:00", "type": "teorik"})
+    assert [room["name"] for room in response.json()] == ["Test Classroom"]
+    response = client.get("/api/classrooms/free", params={"day": "Monday", "time_range": "10:00-11:00", "type": "lab", "min_capacity": 60})
+    assert response.json() == []
+    response = client.get("/api/classrooms/free", params={"day": "Monday", "time_range": "11:00-10:00"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
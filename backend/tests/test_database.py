@@ -0,0 +1,31 @@
+from sqlalchemy import text
+from database import create_app_engine, engine_options
+
+def test_sqlite_profile_applies_pragmas(tmp_path, monkeypatch):
+    """File databases get the tuned pragmas on every connection; WAL only on request."""
+    monkeypatch.delenv("SQLITE_JOURNAL_MODE", raising=False)
+    engine = create_app_engine(f"sqlite:///{tmp_path / 'data' / 'plain.db'}")
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "delete"
+    engine.dispose()
+    monkeypatch.setenv("SQLITE_JOURNAL_MODE", "WAL")
+    monkeypatch.setenv("SQLITE_CACHE_SIZE", "-2000")
+    engine = create_app_engine(f"sqlite:///{tmp_path / 'data' / 'app.db'}")
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1
+        assert conn.execute(text("PRAGMA cache_size")).scalar() == -2000
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+    engine.dispose()
+
+def test_postgres_profile_pool_settings(monkeypatch):
+    """Server databases get pool sizing, pre-ping and a statement timeout."""
+    monkeypatch.setenv("DB_POOL_SIZE", "4")
+    monkeypatch.setenv("DB_STATEMENT_TIMEOUT_MS", "15000")
+    options = engine_options("postgresql+psycopg2://user:secret@db/swesys")
+    assert options["pool_size"] == 4
+    assert options["max_overflow"] == 20
+    assert options["pool_pre_ping"] is True
+    assert options["connect_args"] == {"options": "-c statement_timeout=15000"}
+    monkeypatch.setenv("DB_STATEMENT_TIMEOUT_MS", "0")
+    assert "connect_args" not in engine_options("postgresql://db/swesys")
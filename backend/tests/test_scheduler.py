@@ -0,0 +1,637 @@
+import json
+import subprocess
+import sys
+import pytest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from models import Teacher, Classroom, Course, CourseSession, CourseDepartment, Schedule, ScheduleJob, compile_working_hours
+from sqlalchemy import event
+from app.api.endpoints.scheduler import (
+    generate_schedule_genetic, get_suitable_classrooms, is_conflict, build_session_table, save_genetic_schedule
+)
+from services.scheduling.fitness import FitnessEngine, count_overlaps
+from services.scheduling.genome import SessionTable
+from services.scheduling.evolution import PopulationRunner, Termination, migrate, run_genetic
+from services.scheduling.delta import OccupancyState, Individual
+from services.scheduling.jobs import JobManager, job_manager
+from services.scheduling.csp import solve_csp
+from services.scheduling.localsearch import improve
+from services.scheduling.dsatur import build_dsatur
+from services.scheduling.bitset import OccupancyIndex, cohorts
+from routers.scheduler import is_conflict as legacy_is_conflict
+from services.scheduling.decompose import components, run_decomposed
+from services.scheduling.penalty import PenaltyModel
+from services.scheduling.rooms import ClassroomIndex, normalize_type
+from services.scheduling.snapshot import load_snapshot
+from services.scheduling.persist import replace_schedules
+import numpy as np
+
+def make_course(course_id, departments, level="Bachelor", student_count=20, teacher_id=1):
+    return SimpleNamespace(
+        id=course_id,
+        level=level,
+        student_count=student_count,
+        teacher_id=teacher_id,
+        departments=[SimpleNamespace(department=d, student_count=student_count) for d in departments]
+    )
+
+def place(table, genome, session, day, start, classroom_id):
+    h, m = map(int, start.split(':'))
+    genome[session] = (table.days.index(day), (h * 60 + m) // table.slot_minutes, table.room_index[classroom_id])
+    return genome
+
+@pytest.fixture
+def engine_setup():
+    courses = [
+        make_course(1, ["Computer Science"], teacher_id=1),
+        make_course(2, ["Computer Science"], teacher_id=2),
+        make_course(3, ["Mathematics"], student_count=60, teacher_id=3),
+        make_course(4, ["Physics"], teacher_id=1),
+    ]
+    teachers = {
+        teacher_id: SimpleNamespace(id=teacher_id, working_hours="08:00-18:00", working_days="monday,tuesday,friday")
+        for teacher_id in (1, 2, 3)
+    }
+    classrooms = [
+        SimpleNamespace(id=10, capacity=30, type="Theoretical"),
+        SimpleNamespace(id=11, capacity=80, type="Theoretical"),
+    ]
+    course_sessions = {course.id: [SimpleNamespace(type="teorik", hours=2)] for course in courses}
+    table = SessionTable(courses, teachers, classrooms, course_sessions, lambda kind, rooms, students: classrooms)
+    return table, FitnessEngine.for_table(table)
+
+def test_count_overlaps_sorted_groups():
+    """Only intervals sharing a group and overlapping in time are counted."""
+    group = np.array([0, 0, 1, 1, 0])
+    start = np.array([540, 600, 540, 660, 720])
+    end = np.array([660, 720, 660, 720, 780])
+    # 600-720 overlaps 540-660 in group 0; 720-780 only touches 600-720
+    assert count_overlaps(group, start, end) == 1
+
+def test_valid_schedule_scores_session_count(engine_setup):
+    """A conflict-free genome scores the number of placed sessions."""
+    table, engine = engine_setup
+    genome = table.new_genome()
+    place(table, genome, 0, "monday", "09:00", 10)
+    place(table, genome, 1, "monday", "11:00", 10)
+    place(table, genome, 2, "monday", "09:00", 11)
+    assert engine.score_genome(genome) == 3
+
+def test_partial_overlaps_are_violations(engine_setup):
+    """Overlapping but non-identical time ranges are detected per resource."""
+    table, engine = engine_setup
+    room_clash = place(table, place(table, table.new_genome(), 0, "monday", "09:00", 11), 2, "monday", "10:00", 11)
+    teacher_clash = place(table, place(table, table.new_genome(), 0, "tuesday", "09:00", 10), 3, "tuesday", "10:30", 11)
+    cohort_clash = place(table, place(table, table.new_genome(), 0, "friday", "09:00", 10), 1, "friday", "10:00", 11)
+    assert engine.count_violations(room_clash)["room"] == 1
+    assert engine.count_violations(teacher_clash)["teacher"] == 1
+    assert engine.count_violations(cohort_clash)["cohort"] == 1
+    for genome in (room_clash, teacher_clash, cohort_clash):
+        assert engine.score_genome(genome) == 0
+
+def test_capacity_violation(engine_setup):
+    """A course larger than its classroom scores zero."""
+    table, engine = engine_setup
+    genome = place(table, table.new_genome(), 2, "monday", "09:00", 10)
+    assert engine.count_violations(genome)["capacity"] == 1
+    assert engine.score_genome(genome) == 0
+
+@pytest.fixture
+def genetic_dataset(db):
+    hours = ["09:00", "09:30", "10:00", "10:30", "11:00", "11:30", "12:00", "12:30", "13:00"]
+    teacher = Teacher(
+        name="GA Teacher",
+        email="ga.teacher@example.com",
+        faculty="Test Faculty",
+        department="Computer Science",
+        working_hours=json.dumps({"monday": hours, "tuesday": hours})
+    )
+    db.add(teacher)
+    db.add_all([
+        Classroom(name="A101", capacity=40, type="teorik", faculty="Test Faculty", department="Computer Science"),
+        Classroom(name="LAB1", capacity=40, type="lab", faculty="Test Faculty", department="Computer Science"),
+    ])
+    db.commit()
+    courses = []
+    for code, sessions in (("CS101", [("teorik", 2), ("lab", 2)]), ("CS102", [("teorik", 1)])):
+        course = Course(
+            name=code, code=code, teacher_id=teacher.id, faculty="Test Faculty",
+            level="1", category="zorunlu", semester="Fall", ects=5, is_active=True, student_count=30
+        )
+        course.departments = [CourseDepartment(department="Computer Science", student_count=30)]
+        course.sessions = [CourseSession(type=t, hours=h) for t, h in sessions]
+        db.add(course)
+        courses.append(course)
+    db.commit()
+    teachers = {teacher.id: teacher}
+    return courses, teachers, db.query(Classroom).all()
+
+def test_genetic_scheduler_places_all_sessions(db, genetic_dataset):
+    """The GA decodes its best genome into conflict-free Schedule rows."""
+    courses, teachers, classrooms = genetic_dataset
+    result = generate_schedule_genetic(courses, teachers, classrooms, db, generations=5, pop_size=10, seed=7)
+    assert result["success"]
+    assert result["scheduled_count"] == 3
+    assert result["unscheduled_count"] == 0
+    assert result["perfect"]
+    rows = db.query(Schedule).all()
+    assert len(rows) == 3
+    assert all(row.day in ("Monday", "Tuesday") for row in rows)
+
+def test_status_counts_sessions_in_sql(client, db, genetic_dataset):
+    """Status matches sessions to entries by stored minute durations."""
+    courses, teachers, classrooms = genetic_dataset
+    generate_schedule_genetic(courses, teachers, classrooms, db, generations=5, pop_size=10, seed=7)
+    data = client.get("/api/scheduler/status").json()
+    assert (data["total_active_sessions"], data["scheduled_sessions"]) == (3, 3)
+    db.query(Schedule).filter(Schedule.course_id == courses[1].id).delete()
+    db.commit()
+    assert client.get("/api/scheduler/status").json()["scheduled_sessions"] == 2
+
+def test_snapshot_loads_problem_in_constant_queries(db, genetic_dataset):
+    """The solve reads sessions and departments from the snapshot, not per course."""
+    statements = []
+    def count(*args):
+        statements.append(args[2])
+    event.listen(db.get_bind(), "before_cursor_execute", count)
+    try:
+        snapshot = load_snapshot(db)
+        assert len(statements) <= 6
+        assert [[s.type for s in c.sessions] for c in snapshot.courses] == [["lab", "teorik"], ["teorik"]]
+        with pytest.raises(AttributeError):
+            snapshot.courses[0].level = "2"
+        statements.clear()
+        table = build_session_table(snapshot.courses, snapshot.teachers, snapshot.classrooms, db)
+        assert statements == [] and len(table) == 3
+        genome, _ = run_genetic(table, generations=3, pop_size=6, seed=1)
+        result = save_genetic_schedule(table, genome, snapshot.courses, db)
+        assert result["scheduled_count"] + result["unscheduled_count"] == 3
+        assert not any("course_sessions" in sql or "course_departments" in sql for sql in statements)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", count)
+
+def test_bulk_write_out_is_atomic(db, genetic_dataset, monkeypatch):
+    """Rows are swapped in one insert batch; the summary matches the stored rows."""
+    courses, teachers, classrooms = genetic_dataset
+    db.add(Schedule(day="Friday", time_range="09:00-10:00", course_id=courses[0].id, classroom_id=classrooms[0].id))
+    db.commit()
+    statements = []
+    def count(*args):
+        statements.append(args[2])
+    event.listen(db.get_bind(), "before_cursor_execute", count)
+    try:
+        result = generate_schedule_genetic(courses, teachers, classrooms, db, generations=5, pop_size=10, seed=7)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", count)
+    assert sum(sql.startswith("INSERT INTO schedule ") for sql in statements) == 1
+    stored = {(r.id, r.day, r.time_range, r.course_id, r.classroom_id) for r in db.query(Schedule).all()}
+    summary = {(e["id"], e["day"], e["time_range"], e["course"]["id"], e["classroom"]["id"]) for e in result["schedule"]}
+    assert stored == summary and len(stored) == 3
+    # Yazma başarısız olursa eski program olduğu gibi kalır
+    monkeypatch.setattr(db, "bulk_insert_mappings", lambda *a, **k: (_ for _ in ()).throw(RuntimeError("disk")))
+    with pytest.raises(RuntimeError):
+        replace_schedules(db, [{"day": "Monday", "time_range": "09:00-10:00",
+                                "course_id": courses[1].id, "classroom_id": classrooms[0].id}])
+    assert {(r.id, r.day, r.time_range, r.course_id, r.classroom_id) for r in db.query(Schedule).all()} == stored
+
+def test_session_table_round_trip(genetic_dataset):
+    """Genomes are fixed-length int arrays that decode to Schedule columns."""
+    courses, teachers, classrooms = genetic_dataset
+    course_sessions = {c.id: list(c.sessions) for c in courses}
+    table = SessionTable(courses, teachers, classrooms, course_sessions, get_suitable_classrooms)
+    genome = table.new_genome()
+    assert genome.shape == (3, 3)
+    assert table.decode(genome) == []
+    genome[0] = (0, 18, 0)  # Pazartesi 09:00, ilk derslik
+    assert table.decode(genome) == [{
+        "day": "Monday",
+        "time_range": "09:00-11:00",
+        "start_minute": 540,
+        "end_minute": 660,
+        "course_id": courses[0].id,
+        "classroom_id": classrooms[0].id,
+    }]
+    # Aynı öğretmen ve bölüm için çakışan yerleşim reddedilir
+    state = OccupancyState.from_genome(table, genome)
+    assert not state.can_place(table, 2, 0, 19, 1)
+    assert state.can_place(table, 2, 1, 19, 1)
+
+def test_parallel_population_matches_serial(genetic_dataset):
+    """With a fixed seed, worker processes reproduce the serial population."""
+    courses, teachers, classrooms = genetic_dataset
+    course_sessions = {c.id: list(c.sessions) for c in courses}
+    table = SessionTable(courses, teachers, classrooms, course_sessions, get_suitable_classrooms)
+    results = []
+    for workers in (None, 2):
+        with PopulationRunner(table, np.random.SeedSequence(42), workers=workers) as runner:
+            population = runner.initialize(8)
+            population = runner.mutate(population, [0, 3, 5], generation=1)
+            results.append((population, runner.evaluate(population)))
+    (serial, serial_scores), (parallel, parallel_scores) = results
+    assert serial_scores == parallel_scores
+    assert all(np.array_equal(a.genome, b.genome) for a, b in zip(serial, parallel))
+
+def test_ring_migration_replaces_worst():
+    """Each island's best individuals replace the worst of the next island."""
+    populations = [[np.full((1, 3), k * 10 + i, dtype=np.int16) for i in range(3)] for k in range(3)]
+    scores = [[1, 5, 3], [2, 0, 4], [9, 8, 7]]
+    migrate(populations, scores, migrants=1)
+    assert scores == [[9, 5, 3], [2, 5, 4], [9, 8, 4]]
+    assert populations[1][1][0, 0] == 1    # ada 0'ın en iyisi
+    assert populations[2][2][0, 0] == 12   # ada 1'in en iyisi
+    assert populations[0][0][0, 0] == 20   # ada 2'nin en iyisi
+
+def test_island_model_returns_global_best(db, genetic_dataset):
+    """Island mode evolves sub-populations in processes and keeps the best."""
+    courses, teachers, classrooms = genetic_dataset
+    result = generate_schedule_genetic(
+        courses, teachers, classrooms, db, generations=4, pop_size=6, seed=3,
+        islands=2, migration_interval=2, migrants=1
+    )
+    assert result["scheduled_count"] == 3
+    assert result["perfect"]
+
+def test_delta_state_tracks_full_evaluation(genetic_dataset):
+    """Counters maintained move by move agree with a full re-evaluation."""
+    courses, teachers, classrooms = genetic_dataset
+    course_sessions = {c.id: list(c.sessions) for c in courses}
+    table = SessionTable(courses, teachers, classrooms, course_sessions, get_suitable_classrooms)
+    engine = FitnessEngine.for_table(table)
+    rng = np.random.default_rng(0)
+    individual = Individual(table.new_genome())
+    for _ in range(200):
+        i = rng.integers(len(table))
+        if rng.random() < 0.2:
+            individual.move(table, i, -1, -1, -1)
+        else:
+            individual.move(table, i, rng.integers(len(table.days)), rng.integers(18, 24), rng.integers(len(classrooms)))
+        fresh = OccupancyState.from_genome(table, individual.genome)
+        assert individual.state.conflicts == fresh.conflicts
+        assert individual.score(table) == engine.score_genome(individual.genome)
+
+def test_schedule_job_runs_in_background(client, genetic_dataset):
+    """A submitted job reports progress and keeps its result after finishing."""
+    response = client.post("/api/scheduler/jobs", params={"generations": 3, "pop_size": 6, "seed": 1})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert job_manager.wait(job_id, timeout=60)
+    job = client.get(f"/api/scheduler/jobs/{job_id}").json()
+    assert job["status"] == "completed"
+    assert job["best_fitness"] == 3
+    assert job["result"]["stop_reason"] == "optimal"
+    assert job["result"]["scheduled_count"] == 3
+    assert client.delete(f"/api/scheduler/jobs/{job_id}").status_code == 409
+
+def test_jobs_accept_generate_parameters(client, genetic_dataset):
+    """Jobs run every /generate method with the same parameter set."""
+    runs = (({"method": "dsatur"}, "DSatur"), ({"decompose": True, "generations": 3, "pop_size": 6}, "Genetik"))
+    for params, engine in runs:
+        job_id = client.post("/api/scheduler/jobs", params={**params, "seed": 1}).json()["job_id"]
+        assert job_manager.wait(job_id, timeout=60)
+        job = client.get(f"/api/scheduler/jobs/{job_id}").json()
+        assert job["status"] == "completed" and job["params"]["seed"] == 1
+        assert job["result"]["message"].startswith(engine) and job["result"]["scheduled_count"] == 3
+    for path in ("/api/scheduler/jobs", "/api/scheduler/generate"):
+        assert client.post(path, params={"decompose": True, "islands": 2}).status_code == 400
+
+@pytest.fixture
+def overbooked_dataset(db, genetic_dataset):
+    courses, teachers, classrooms = genetic_dataset
+    # Öğretmenin 8 saatine 9 saatlik oturum: optimuma hiç ulaşılamaz
+    extra = Course(
+        name="CS103", code="CS103", teacher_id=courses[0].teacher_id, faculty="Test Faculty",
+        level="2", category="zorunlu", semester="Fall", ects=5, is_active=True, student_count=30
+    )
+    extra.departments = [CourseDepartment(department="Mathematics", student_count=30)]
+    extra.sessions = [CourseSession(type="teorik", hours=4)]
+    db.add(extra)
+    db.commit()
+    return courses + [extra], teachers, classrooms
+
+def test_schedule_job_cancellation(client, db, overbooked_dataset):
+    """Cancelling stops a running job between generations without saving."""
+    job_id = client.post("/api/scheduler/jobs", params={"generations": 10**7, "pop_size": 4}).json()["job_id"]
+    # Testte tek SQLite bağlantısı paylaşıldığından iptal doğrudan istenir
+    assert job_manager.cancel(db, job_id) == "cancelling"
+    assert job_manager.wait(job_id, timeout=60)
+    job = client.get(f"/api/scheduler/jobs/{job_id}").json()
+    assert job["status"] == "cancelled"
+    assert "result" not in job
+    assert client.delete(f"/api/scheduler/jobs/{job_id}").json()["status"] == "cancelled"
+    assert client.get("/api/scheduler/jobs/unknown").status_code == 404
+
+def test_schedule_job_stops_on_cancel_flag(client, db, overbooked_dataset, monkeypatch):
+    """A cancel recorded by another worker reaches the owner on its next poll."""
+    monkeypatch.setattr(JobManager, "HEARTBEAT_SECONDS", 0.05)
+    job_id = client.post("/api/scheduler/jobs", params={"generations": 10**7, "pop_size": 4}).json()["job_id"]
+    db.query(ScheduleJob).filter(ScheduleJob.id == job_id).update({ScheduleJob.cancel_requested: True})
+    db.commit()
+    assert job_manager.wait(job_id, timeout=60)
+    job = client.get(f"/api/scheduler/jobs/{job_id}").json()
+    assert job["status"] == "cancelled"
+    assert "result" not in job
+    assert db.query(Schedule).count() == 0
+
+def test_jobs_of_other_owners_are_flagged_or_recovered(db):
+    """Live owners get a cancel flag; jobs of gone owners are closed."""
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    now = datetime.utcnow()
+    rows = {
+        "remote": ScheduleJob(id="remote", status="running", owner="elsewhere:1", heartbeat_at=now),
+        "stale": ScheduleJob(id="stale", status="running", owner="elsewhere:2", heartbeat_at=now - timedelta(hours=1)),
+        "dead": ScheduleJob(id="dead", status="running", owner=f"{job_manager.owner.rpartition(':')[0]}:{dead.pid}", heartbeat_at=now),
+        "legacy": ScheduleJob(id="legacy", status="running"),
+    }
+    db.add_all(rows.values())
+    db.commit()
+    assert job_manager.cancel(db, "remote") == "cancelling"
+    assert rows["remote"].status == "running" and rows["remote"].cancel_requested
+    assert job_manager.cancel(db, "stale") == "cancelled"
+    assert job_manager.recover(db) == 2
+    assert rows["remote"].status == "running"
+    assert rows["dead"].status == "failed" and rows["legacy"].status == "failed"
+
+def test_genetic_scheduler_stops_at_optimum(db, genetic_dataset):
+    """A run ends as soon as every placeable session is placed cleanly."""
+    courses, teachers, classrooms = genetic_dataset
+    result = generate_schedule_genetic(courses, teachers, classrooms, db, generations=10**6, pop_size=6, seed=5)
+    assert result["stop_reason"] == "optimal"
+    assert result["generations_run"] < 10**6
+    assert result["scheduled_count"] == 3
+
+def test_termination_reasons():
+    """Stall, time limit and cancellation are reported by Termination."""
+    stall = Termination(optimum=10, stall_generations=3)
+    assert all(stall(gen, 4) for gen in range(3))
+    assert not stall(3, 4)
+    assert stall.stop_reason == "stalled"
+    assert not Termination(optimum=10, deadline=0)(1, 4)
+    cancelled = Termination(progress=lambda gen, best: False)
+    assert not cancelled(1, 4)
+    assert cancelled.stop_reason == "cancelled"
+
+def test_incremental_generation_keeps_valid_entries(db, genetic_dataset):
+    """Only the edited course is re-planned; other rows keep their ids."""
+    courses, teachers, classrooms = genetic_dataset
+    generate_schedule_genetic(courses, teachers, classrooms, db, generations=5, pop_size=6, seed=2)
+    before = {(row.id, row.course_id, row.day, row.time_range) for row in db.query(Schedule).all()}
+    courses[1].sessions[0].type = "lab"
+    db.commit()
+    result = generate_schedule_genetic(
+        courses, teachers, classrooms, db, generations=5, pop_size=6, seed=2, incremental=True
+    )
+    assert result["kept_count"] == 2
+    assert result["scheduled_count"] == 3
+    after = {(row.id, row.course_id, row.day, row.time_range) for row in db.query(Schedule).all()}
+    assert {entry for entry in before if entry[1] == courses[0].id} <= after
+    edited = db.query(Schedule).filter(Schedule.course_id == courses[1].id).one()
+    assert edited.classroom.type == "lab"
+
+def test_fitness_cache_invalidated_only_on_change(genetic_dataset):
+    """Unchanged copies keep their score; real moves clear it."""
+    courses, teachers, classrooms = genetic_dataset
+    course_sessions = {c.id: list(c.sessions) for c in courses}
+    table = SessionTable(courses, teachers, classrooms, course_sessions, get_suitable_classrooms)
+    with PopulationRunner(table, np.random.SeedSequence(4)) as runner:
+        population = runner.initialize(4)
+        runner.evaluate(population)
+        assert (runner.evaluations, runner.cache_hits) == (4, 0)
+        children = population[0].crossover(table, population[0], 1)
+        runner.evaluate(population + children)
+        assert (runner.evaluations, runner.cache_hits) == (4, 6)
+    individual = population[0]
+    individual.move(table, 0, *individual.genome[0])
+    assert individual.fitness is not None
+    individual.move(table, 0, -1, -1, -1)
+    assert individual.fitness is None
+
+def test_genetic_run_reports_evaluation_counters(db, overbooked_dataset):
+    """Scores are looked up once per generation and reused when unchanged."""
+    courses, teachers, classrooms = overbooked_dataset
+    result = generate_schedule_genetic(courses, teachers, classrooms, db, generations=5, pop_size=6, seed=9)
+    assert result["stop_reason"] == "generations"
+    # Başlangıçta iki kez, sonra her nesilde bir kez
+    assert result["evaluations"] + result["cache_hits"] == 6 * 2 + 6 * 5
+    assert result["cache_hits"] >= 6
+
+def test_csp_method_places_all_sessions(client, genetic_dataset):
+    """?method=csp finds a complete conflict-free schedule."""
+    response = client.post("/api/scheduler/generate", params={"method": "csp"})
+    assert response.status_code == 200
+    result = response.json()
+    assert result["stop_reason"] == "optimal"
+    assert result["scheduled_count"] == 3
+    assert result["perfect"]
+
+def test_csp_proves_infeasibility(overbooked_dataset):
+    """An overbooked teacher is reported as infeasible, not timed out."""
+    courses, teachers, classrooms = overbooked_dataset
+    course_sessions = {c.id: list(c.sessions) for c in courses}
+    table = SessionTable(courses, teachers, classrooms, course_sessions, get_suitable_classrooms)
+    genome, info = solve_csp(table)
+    assert info["stop_reason"] == "infeasible"
+    assert info["proven_infeasible"]
+    assert info["best_fitness"] == 3
+    assert FitnessEngine.for_table(table).score_genome(genome) == 3
+
+def test_local_search_fills_empty_schedule(overbooked_dataset):
+    """Insert/eject moves reach the best reachable placement count."""
+    courses, teachers, classrooms = overbooked_dataset
+    course_sessions = {c.id: list(c.sessions) for c in courses}
+    table = SessionTable(courses, teachers, classrooms, course_sessions, get_suitable_classrooms)
+    best, info = improve(table, Individual(table.new_genome()), np.random.default_rng(0), max_iterations=500)
+    assert info["start_fitness"] == 0
+    assert info["best_fitness"] == 3
+    assert FitnessEngine.for_table(table).score_genome(best.genome) == 3
+
+def test_local_search_after_genetic_run(db, overbooked_dataset):
+    """run_genetic reports the post-optimisation and never gets worse."""
+    courses, teachers, classrooms = overbooked_dataset
+    course_sessions = {c.id: list(c.sessions) for c in courses}
+    table = SessionTable(courses, teachers, classrooms, course_sessions, get_suitable_classrooms)
+    genome, info = run_genetic(table, seed=1, generations=2, pop_size=4, local_search_iterations=200)
+    assert info["local_search"]["iterations"] == 200
+    assert info["best_fitness"] >= info["local_search"]["start_fitness"]
+    assert FitnessEngine.for_table(table).score_genome(genome) == info["best_fitness"]
+
+def test_dsatur_builds_conflict_free_schedule(genetic_dataset):
+    """DSatur colours every session without hard-constraint violations."""
+    courses, teachers, classrooms = genetic_dataset
+    course_sessions = {c.id: list(c.sessions) for c in courses}
+    table = SessionTable(courses, teachers, classrooms, course_sessions, get_suitable_classrooms)
+    individual = build_dsatur(table)
+    assert individual.score(table) == 3
+    assert FitnessEngine.for_table(table).score_genome(individual.genome) == 3
+    randomised = build_dsatur(table, np.random.default_rng(5))
+    assert FitnessEngine.for_table(table).score_genome(randomised.genome) == 3
+
+def test_dsatur_method_and_seeding(client, overbooked_dataset):
+    """?method=dsatur saves the construction; dsatur_seeds seed the GA."""
+    response = client.post("/api/scheduler/generate", params={"method": "dsatur"})
+    assert response.status_code == 200
+    result = response.json()
+    assert result["stop_reason"] == "constructed"
+    assert result["scheduled_count"] == 3
+    courses, teachers, classrooms = overbooked_dataset
+    course_sessions = {c.id: list(c.sessions) for c in courses}
+    table = SessionTable(courses, teachers, classrooms, course_sessions, get_suitable_classrooms)
+    genome, info = run_genetic(table, seed=2, generations=0, pop_size=4, dsatur_seeds=2)
+    assert info["best_fitness"] == 3
+
+def test_occupancy_index_conflicts():
+    """Bitmask checks match the entry-scanning rules of the greedy path."""
+    occupancy = OccupancyIndex()
+    occupancy.reserve("monday", "09:00-11:00", 1, 10, cohorts(["CS"], "Bachelor"))
+    assert is_conflict(occupancy, "monday", "10:00-12:00", 2, 10, ["EE"], "Bachelor")
+    assert is_conflict(occupancy, "monday", "10:30-11:30", 1, 11, ["EE"], "Bachelor")
+    assert is_conflict(occupancy, "monday", "08:00-09:00", 2, 11, ["CS"], "Bachelor")
+    assert not is_conflict(occupancy, "monday", "11:15-12:00", 1, 10, ["CS"], "Bachelor")
+    assert not is_conflict(occupancy, "tuesday", "09:00-11:00", 1, 10, ["CS"], "Bachelor")
+    assert not is_conflict(occupancy, "monday", "09:00-11:00", 2, 11, ["CS"], "Master")
+    entries = [{"day": "monday", "time_slot": "09:00-11:00", "teacher_id": 1, "classroom_id": 10,
+                "departments": ["CS"], "level": "Bachelor"}]
+    assert is_conflict(entries, "monday", "10:45-11:15", 3, 10, [], "Bachelor")
+    # Önceki kural birebir: uçları değen aralıklar çakışır, her pozitif ara serbesttir
+    for check in (is_conflict, legacy_is_conflict):
+        assert check(occupancy, "monday", "11:00-12:00", 1, 11, [], "Bachelor")
+        assert check(occupancy, "monday", "08:10-09:00", 2, 10, [], "Bachelor")
+        assert not check(occupancy, "monday", "11:05-12:00", 1, 11, [], "Bachelor")
+        assert not check(occupancy, "monday", "08:00-08:50", 2, 10, [], "Bachelor")
+    occupancy.release("monday", "09:00-11:00", 1, 10, cohorts(["CS"], "Bachelor"))
+    assert not is_conflict(occupancy, "monday", "10:00-12:00", 1, 10, ["CS"], "Bachelor")
+
+def test_classroom_index_buckets():
+    """Type aliases share a bucket and capacity queries return the fitting tail."""
+    rooms = [
+        SimpleNamespace(id=1, type="Laboratuvar", capacity=40),
+        SimpleNamespace(id=2, type="lab", capacity=20),
+        SimpleNamespace(id=3, type="Theoretical", capacity=100),
+        SimpleNamespace(id=4, type="teorik", capacity=60),
+        SimpleNamespace(id=5, type="studio", capacity=15),
+    ]
+    index = ClassroomIndex(rooms)
+    assert normalize_type(" Uygulamalı  Ders ") == "lab"
+    assert [r.id for r in index.suitable("laboratory", 0)] == [2, 1]
+    assert [r.id for r in index.suitable("lab", 21)] == [1]
+    assert [r.id for r in index.suitable("Lecture", 60)] == [4, 3]
+    assert [r.id for r in index.suitable("Studio", 10)] == [5]
+    assert index.suitable("lab", 41) == [] and index.suitable("seminar", 0) == []
+    assert [r.id for r in index.suitable(None, 50)] == [4, 3]
+    assert [r.id for r in get_suitable_classrooms("lab", rooms, 30)] == [1]
+
+def test_session_table_reads_availability_masks(db, genetic_dataset):
+    """Working hours compile to day masks; blocked slots leave the GA domain."""
+    assert compile_working_hours('{"Monday": ["09:00", "09:30", "10:00"]}') == {"monday": 0b11 << 18}
+    assert compile_working_hours("09:00-10:30", "Monday, friday") == {"monday": 0b111 << 18, "friday": 0b111 << 18}
+    assert compile_working_hours("09:00-17:00", None) == {} and compile_working_hours("garbage") == {}
+    courses, teachers, classrooms = genetic_dataset
+    teacher = next(iter(teachers.values()))
+    assert teacher.availability_masks == {"monday": 0xFF << 18, "tuesday": 0xFF << 18}
+    teacher.set_unavailable_masks({"monday": 0xFF << 18, "tuesday": 0b11 << 18})
+    db.commit()
+    snapshot = load_snapshot(db)
+    assert snapshot.teachers[teacher.id].availability_masks == {"tuesday": 0b111111 << 20}
+    course_sessions = {c.id: list(c.sessions) for c in snapshot.courses}
+    table = SessionTable(snapshot.courses, snapshot.teachers, classrooms, course_sessions, get_suitable_classrooms)
+    assert table.days == ["tuesday"]
+    assert {int(start) for slots in table.domain_slots for start in slots[:, 1]} <= set(range(20, 26))
+
+def test_decomposition_solves_independent_faculties(db, genetic_dataset):
+    """Faculties without shared resources are solved apart and merged."""
+    courses, teachers, classrooms = genetic_dataset
+    hours = ["09:00", "09:30", "10:00", "10:30", "11:00"]
+    teacher = Teacher(name="Art Teacher", email="art.teacher@example.com", faculty="Fine Arts",
+                      department="Painting", working_hours=json.dumps({"monday": hours}))
+    studio = Classroom(name="S1", capacity=20, type="studio", faculty="Fine Arts", department="Painting")
+    db.add_all([teacher, studio])
+    db.commit()
+    course = Course(name="ART101", code="ART101", teacher_id=teacher.id, faculty="Fine Arts", level="1",
+                    category="zorunlu", semester="Fall", ects=5, is_active=True, student_count=15)
+    course.departments = [CourseDepartment(department="Painting", student_count=15)]
+    course.sessions = [CourseSession(type="studio", hours=2)]
+    db.add(course)
+    db.commit()
+    courses = courses + [course]
+    teachers = {**teachers, teacher.id: teacher}
+    classrooms = classrooms + [studio]
+    course_sessions = {c.id: list(c.sessions) for c in courses}
+    table = SessionTable(courses, teachers, classrooms, course_sessions, get_suitable_classrooms)
+    assert [len(part) for part in components(table)] == [3, 1]
+    genome, info = run_decomposed(table, seed=3, generations=5, pop_size=6)
+    assert info["best_fitness"] == 4
+    assert [part["sessions"] for part in info["components"]] == [3, 1]
+    parallel, _ = run_decomposed(table, seed=3, workers=2, generations=5, pop_size=6)
+    assert (parallel == genome).all()
+    # max_seconds tüm bileşenler için ortak bir süre sınırıdır
+    _, limited = run_decomposed(table, seed=3, generations=10**6, pop_size=6, max_seconds=0.3, soft_weights={})
+    assert limited["elapsed_seconds"] < 0.6
+    assert [part["stop_reason"] for part in limited["components"]] == ["time_limit", "time_limit"]
+    with pytest.raises(ValueError):
+        run_decomposed(table, seed=3, islands=2)
+    # İptal havuzdaki bileşenlere de ulaşır; seri modda kalan bileşenler atlanır
+    for workers in (None, 2):
+        calls = []
+        _, cancelled = run_decomposed(table, seed=3, workers=workers, generations=10**7, pop_size=6,
+                                      soft_weights={}, progress=lambda gen, best: calls.append(gen) or False)
+        assert calls and cancelled["stop_reason"] == "cancelled"
+        assert [part["stop_reason"] for part in cancelled["components"]] == ["cancelled", "cancelled"]
+        if workers is None:
+            assert cancelled["generations_run"] <= 1 and cancelled["components"][1]["best_fitness"] == 0
+
+def test_seeded_runs_are_reproducible(overbooked_dataset):
+    """A seed fixes the genome, with or without worker processes."""
+    courses, teachers, classrooms = overbooked_dataset
+    course_sessions = {c.id: list(c.sessions) for c in courses}
+    table = SessionTable(courses, teachers, classrooms, course_sessions, get_suitable_classrooms)
+    genome, info = run_genetic(table, generations=4, pop_size=6)
+    assert isinstance(info["seed"], int)
+    replay, replay_info = run_genetic(table, seed=info["seed"], generations=4, pop_size=6, workers=2)
+    assert (replay == genome).all()
+    assert replay_info["best_fitness"] == info["best_fitness"]
+
+def test_generate_with_seed(client, overbooked_dataset):
+    """/generate?seed= reports the seed and repeats the same schedule."""
+    params = {"seed": 11, "stall_generations": 5}
+    first = client.post("/api/scheduler/generate", params=params).json()
+    second = client.post("/api/scheduler/generate", params=params).json()
+    assert first["seed"] == second["seed"] == 11
+    key = lambda entry: (entry["course"]["id"], entry["day"], entry["time_range"])
+    assert sorted(map(key, first["schedule"])) == sorted(map(key, second["schedule"]))
+
+def test_penalty_terms(genetic_dataset):
+    """Soft terms are computed per genome and in one batch alike."""
+    courses, teachers, classrooms = genetic_dataset
+    course_sessions = {c.id: list(c.sessions) for c in courses}
+    table = SessionTable(courses, teachers, classrooms, course_sessions, get_suitable_classrooms)
+    genome = table.new_genome()
+    genome[0] = (0, 18, 0)  # Pazartesi 09:00-11:00
+    genome[1] = (0, 23, 1)  # Pazartesi 11:30-13:30, aynı ders
+    genome[2] = (1, 18, 0)  # Salı 09:00-10:00
+    model = PenaltyModel(table, {"late": 2}, late_start=13 * 60)
+    assert model.breakdown(genome) == {
+        "hard": 0.0, "unplaced": 0.0, "teacher_gaps": 0.5, "cohort_gaps": 0.5,
+        "oversize": 0.75, "same_day": 1.0, "late": 0.5,
+    }
+    clash = genome.copy()
+    clash[2] = (0, 19, 0)  # Pazartesi 09:30, öğretmen/derslik/kohort çakışması
+    batch = model.terms(np.stack([genome, clash, table.new_genome()]))
+    assert batch[0].tolist() == model.terms(genome)[0].tolist()
+    assert batch[1, 0] == 3
+    assert batch[2, 1] == 3
+    assert model.costs(genome)[0] == pytest.approx(0.5 + 0.5 + 0.75 * 0.5 + 5 + 0.5 * 2)
+
+def test_soft_weights_rank_complete_schedules(client, genetic_dataset):
+    """With soft_weights the GA keeps improving and reports the penalty."""
+    response = client.post("/api/scheduler/generate", params={
+        "seed": 4, "soft_weights": json.dumps({"late": 3}), "stall_generations": 5
+    })
+    assert response.status_code == 200
+    result = response.json()
+    assert result["scheduled_count"] == 3
+    assert result["stop_reason"] == "stalled"
+    assert result["penalty_terms"]["same_day"] == 0
+    assert set(result["penalty_terms"]) >= {"hard", "teacher_gaps", "oversize"}
+    response = client.post("/api/scheduler/generate", params={"soft_weights": json.dumps({"noise": 1})})
+    assert response.status_code == 400
+
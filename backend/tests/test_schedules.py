@@ -1,5 +1,6 @@
 import pytest
 from fastapi import status
+from models import Classroom, Course, CourseDepartment
 
 def test_create_schedule(client, test_course, test_classroom):
     """Test creating a new schedule."""
@@ -61,4 +62,59 @@ def test_update_schedule(client, test_schedule):
 def test_get_nonexistent_schedule(client):
     """Test getting a non-existent schedule."""
     response = client.get("/api/schedules/999")
-    assert response.status_code == status.HTTP_404_NOT_FOUND 
\ No newline at end of file
+    assert response.status_code == status.HTTP_404_NOT_FOUND 
+
+def test_create_schedule_overlapping_classroom(client, test_schedule):
+    """A partially overlapping range in the same classroom is rejected."""
+    schedule_data = {
+        "day": "Monday",
+        "time_range": "10:00-11:00",
+        "course_id": test_schedule.course_id,
+        "classroom_id": test_schedule.classroom_id
+    }
+    response = client.post("/api/schedules", json=schedule_data)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "classroom" in response.json()["detail"]
+    schedule_data["time_range"] = "10:30-12:00"
+    response = client.post("/api/schedules", json=schedule_data)
+    assert response.status_code == status.HTTP_201_CREATED
+
+def test_create_schedule_teacher_and_cohort_conflicts(client, db, test_schedule, test_teacher):
+    """Other rooms still clash through the teacher or a shared cohort."""
+    other_room = Classroom(name="Other", capacity=30, type="Theoretical", faculty="F", department="D")
+    same_teacher = Course(name="Second", code="TEST102", teacher_id=test_teacher.id, level="Master", is_active=True)
+    same_cohort = Course(name="Third", code="TEST103", teacher_id=None, level="Bachelor", is_active=True)
+    db.add_all([other_room, same_teacher, same_cohort])
+    db.commit()
+    db.add(CourseDepartment(course_id=same_cohort.id, department="Test Department", student_count=10))
+    db.commit()
+    for course, kind in ((same_teacher, "teacher"), (same_cohort, "cohort")):
+        response = client.post("/api/schedules", json={
+            "day": "Monday", "time_range": "08:30-09:30", "course_id": course.id, "classroom_id": other_room.id
+        })
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert kind in response.json()["detail"]
+    response = client.put(f"/api/schedules/{test_schedule.id}", json={
+        "day": "Monday", "time_range": "09:30-11:00",
+        "course_id": test_schedule.course_id, "classroom_id": test_schedule.classroom_id
+    })
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_minute_columns_and_overlap_query(client, db, test_schedule):
+    """Minute columns follow time_range on write and back the overlap query."""
+    assert (test_schedule.start_minute, test_schedule.end_minute) == (540, 630)
+    response = client.get("/api/schedules/overlapping", params={"day": "monday", "time_range": "10:15"})
+    assert [s["id"] for s in response.json()] == [test_schedule.id]
+    response = client.get("/api/schedules/overlapping", params={"day": "Monday", "time_range": "10:30-12:00"})
+    assert response.json() == []
+    response = client.get("/api/schedules/overlapping", params={"day": "Monday", "time_range": "noon"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    client.put(f"/api/schedules/{test_schedule.id}", json={
+        "day": "Monday", "time_range": "11:00-12:00",
+        "course_id": test_schedule.course_id, "classroom_id": test_schedule.classroom_id
+    })
+    db.refresh(test_schedule)
+    assert (test_schedule.start_minute, test_schedule.end_minute) == (660, 720)
+    response = client.get("/api/schedules/overlapping", params={"day": "Monday", "time_range": "10:30-12:00"})
+    assert [s["id"] for s in response.json()] == [test_schedule.id]
@@ -1,5 +1,6 @@
 import pytest
 from fastapi import status
+from models import Teacher, TeacherAvailability
 
 def test_create_teacher(client):
     """Test creating a new teacher."""
@@ -59,4 +60,45 @@ def test_delete_teacher(client, test_teacher):
 def test_get_nonexistent_teacher(client):
     """Test getting a non-existent teacher."""
     response = client.get("/api/teachers/999")
-    assert response.status_code == status.HTTP_404_NOT_FOUND 
\ No newline at end of file
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_unavailable_times(client, test_teacher):
+    """Blocked ranges are stored as masks and survive a working hours update."""
+    url = f"/api/teachers/{test_teacher.id}/unavailable-times"
+    response = client.put(url, json={"Monday": ["12:00-13:15"], "tuesday": []})
+    assert response.status_code == status.HTTP_200_OK
+    availability = response.json()["availability"]
+    assert availability["monday"] == ["09:00-12:00", "13:30-17:00"]
+    assert availability["tuesday"] == availability["wednesday"] == ["09:00-17:00"]
+    assert client.put(url, json={"someday": ["09:00-10:00"]}).status_code == status.HTTP_400_BAD_REQUEST
+    assert client.put(url, json={"monday": ["noon"]}).status_code == status.HTTP_400_BAD_REQUEST
+    assert client.put("/api/teachers/999/unavailable-times", json={}).status_code == status.HTTP_404_NOT_FOUND
+    update_data = {
+        "name": test_teacher.name,
+        "email": test_teacher.email,
+        "faculty": test_teacher.faculty,
+        "department": test_teacher.department,
+        "working_hours": "10:00-18:00"
+    }
+    assert client.put(f"/api/teachers/{test_teacher.id}", json=update_data).status_code == status.HTTP_200_OK
+    availability = client.put(url, json={"monday": ["12:00-13:15"]}).json()["availability"]
+    assert availability["monday"] == ["10:00-12:00", "13:30-18:00"]
+    assert availability["wednesday"] == ["10:00-18:00"]
+
+
+def test_availability_rows_follow_both_fields_in_one_commit(db):
+    """Changing working days and hours together keeps one row per day."""
+    teacher = Teacher(name="Mask Teacher", email="mask.teacher@example.com", faculty="F", department="D",
+                      working_days="monday", working_hours="09:00-17:00")
+    db.add(teacher)
+    db.commit()
+    teacher.working_days = "tuesday"
+    teacher.working_hours = '{"monday": ["09:00", "09:30", "10:00"]}'
+    db.commit()
+    rows = db.query(TeacherAvailability).filter(TeacherAvailability.teacher_id == teacher.id).all()
+    assert [(row.day, row.available_mask) for row in rows] == [("monday", 0b11 << 18)]
+    teacher.working_hours = "{}"
+    db.commit()
+    assert db.query(TeacherAvailability).filter(TeacherAvailability.teacher_id == teacher.id).count() == 0
+    assert teacher.availability == [] and teacher.availability_masks == {}